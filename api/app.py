@@ -6,16 +6,26 @@ from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import hashlib
+import io
+import json
 import os
+import threading
 import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
-import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from src.models.sonifier import SemanticSonifier
-from src.utils.logging import logger, setup_logging
+from src.models.base import BaseModel, FALLBACK_CAPTION, FALLBACK_MOOD
+from src.models.sonifier import PipelineResult, SemanticSonifier
+from src.utils.audio import save_wav
+from src.utils.config import config
 
-# Setup logging
-setup_logging()
+# Setup logging - the shared logger is configured from config.logging on first use
+from src.utils.logging import logger
 
 app = FastAPI(
     title="Semantic Sonifier API",
@@ -35,12 +45,213 @@ app.add_middleware(
 # Create directories
 UPLOAD_DIR = Path("uploads")
 OUTPUT_DIR = Path("outputs/web_audio")
+CACHE_DIR = Path("outputs/cache")
 UPLOAD_DIR.mkdir(exist_ok=True)
 OUTPUT_DIR.mkdir(exist_ok=True)
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+# Image analysis results kept in memory, keyed by upload content hash
+ANALYSIS_CACHE_SIZE = 1024
+# Analysis results kept on disk, oldest evicted first
+ANALYSIS_DISK_CACHE_SIZE = 4096
+
+# Dynamic batching - wait briefly for concurrent requests to share forward passes
+MAX_BATCH_SIZE = 4
+MAX_WAIT_MS = 8
+
+@dataclass
+class InferenceRequest:
+    """A queued item awaiting a batched model run"""
+    data: Any
+    future: asyncio.Future
+
+class BatchQueue:
+    """
+    Collects concurrent requests into batches for one pipeline stage
+    
+    The handler is a blocking callable mapping a list of inputs to a list of
+    outputs in the same order; it runs in the threadpool so the event loop
+    stays responsive while the GPU works.
+    """
+    
+    def __init__(self, name: str, handler: Callable[[List[Any]], List[Any]], max_batch_size: int = MAX_BATCH_SIZE):
+        self.name = name
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.queue = None
+        self.worker = None
+    
+    def start(self):
+        """Start the batching coroutine on the running event loop"""
+        self.queue = asyncio.Queue()
+        self.worker = asyncio.create_task(self.inference_coroutine())
+    
+    async def submit(self, data: Any) -> Any:
+        """Queue one input and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(InferenceRequest(data, future))
+        return await future
+    
+    async def _collect_batch(self) -> List[InferenceRequest]:
+        """Block for one request, then gather more for up to MAX_WAIT_MS"""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + MAX_WAIT_MS / 1000
+        
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        return batch
+    
+    async def inference_coroutine(self):
+        """Run queued requests through the handler in batches"""
+        while True:
+            batch = await self._collect_batch()
+            logger.debug(f"{self.name}: dispatching batch of {len(batch)}")
+            
+            try:
+                results = await run_in_threadpool(
+                    self.handler, [request.data for request in batch]
+                )
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+            
+            for request, result in zip(batch, results):
+                if not request.future.done():
+                    request.future.set_result(result)
+
+class AnalysisCache:
+    """
+    LRU cache of image analysis results keyed by SHA-256 of the upload bytes
+    
+    Entries are mirrored to CACHE_DIR as JSON so the cache survives restarts.
+    Keys also cover the analysis settings, so changing models, mood tags or
+    the prompt template never serves results computed under the old ones.
+    Hashing and disk access block - call lookup/get/put from the threadpool.
+    """
+    
+    FIELDS = ('caption', 'primary_mood', 'mood_scores')
+    
+    def __init__(self, cache_dir: Path, max_entries: int = ANALYSIS_CACHE_SIZE,
+                 max_disk_entries: int = ANALYSIS_DISK_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Running count of entries on disk - counted once, then kept up to date by put()
+        self._disk_entries: Optional[int] = None
+        self._fingerprint = hashlib.sha256(json.dumps([
+            config.models.blip2_model,
+            config.models.clip_model,
+            list(config.models.mood_tags),
+            config.models.mood_prompt_template,
+        ]).encode()).digest()
+    
+    def key(self, content: bytes) -> str:
+        """Cache key for an upload under the current analysis settings"""
+        digest = hashlib.sha256(self._fingerprint)
+        digest.update(content)
+        return digest.hexdigest()
+    
+    def _remember(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        
+        path = self.cache_dir / f"{key}.json"
+        try:
+            value = json.loads(path.read_text())
+            # Refresh mtime so disk eviction drops the least recently used entries
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        
+        self._remember(key, value)
+        return value
+    
+    def lookup(self, content: bytes) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Hash an upload and fetch its cached analysis - both block, so run together"""
+        key = self.key(content)
+        return key, self.get(key)
+    
+    def put(self, key: str, analysis_result: Dict[str, Any]):
+        # Fallbacks stand in for failures (e.g. OOM) - don't make them permanent
+        if (analysis_result['caption'] == FALLBACK_CAPTION
+                or analysis_result['primary_mood'] == FALLBACK_MOOD):
+            return
+        
+        value = {field: analysis_result[field] for field in self.FIELDS}
+        self._remember(key, value)
+        path = self.cache_dir / f"{key}.json"
+        is_new = not path.exists()
+        try:
+            path.write_text(json.dumps(value))
+        except OSError as e:
+            logger.warning(f"Could not persist analysis cache entry {key}: {e}")
+            return
+        
+        with self._lock:
+            if self._disk_entries is None:
+                self._disk_entries = sum(1 for _ in self.cache_dir.glob("*.json"))
+            elif is_new:
+                self._disk_entries += 1
+            if self._disk_entries <= self.max_disk_entries:
+                return
+        self._prune_disk()
+    
+    def _prune_disk(self):
+        """
+        Delete the least recently used entries down to 90% of max_disk_entries
+        The headroom keeps a full cache from rescanning the directory on every put
+        """
+        paths = list(self.cache_dir.glob("*.json"))
+        excess = len(paths) - (self.max_disk_entries - self.max_disk_entries // 10)
+        
+        def mtime(path: Path) -> float:
+            try:
+                return path.stat().st_mtime
+            except OSError:
+                return 0.0
+        
+        removed = 0
+        if excess > 0:
+            for path in sorted(paths, key=mtime)[:excess]:
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        
+        # Resync with the directory - other workers may share it
+        with self._lock:
+            self._disk_entries = len(paths) - removed
 
 class SonifierService:
     def __init__(self):
         self.sonifier = None
+        # Image analysis (BLIP-2 + CLIP) batches across requests; MusicGen
+        # runs one clip at a time so analysis of new uploads overlaps generation
+        self.analysis_queue = BatchQueue("analysis", self._analyze_batch)
+        self.music_queue = BatchQueue("music", self._generate_batch, max_batch_size=1)
+        self.analysis_cache = AnalysisCache(CACHE_DIR)
     
     def get_sonifier(self):
         if self.sonifier is None:
@@ -48,6 +259,40 @@ class SonifierService:
             self.sonifier.initialize()
         return self.sonifier
     
+    def start(self):
+        """Start the per-stage batching coroutines"""
+        self.analysis_queue.start()
+        self.music_queue.start()
+    
+    def _analyze_batch(self, images: List[Any]) -> List[Dict[str, Any]]:
+        return self.get_sonifier().image_analyzer.process_batch(images)
+    
+    def _generate_batch(self, requests: List[Tuple[Dict[str, Any], int]]) -> List[Dict[str, Any]]:
+        orchestrator = self.get_sonifier().music_orchestrator
+        return [orchestrator.safe_process(analysis, duration) for analysis, duration in requests]
+    
+    async def analyze(self, image_path: Path, content: bytes) -> Dict[str, Any]:
+        """Analyze an upload, reusing cached results for identical image bytes"""
+        # Hashing a multi-MB upload would stall the event loop - do it off-loop
+        cache_key, cached = await run_in_threadpool(self.analysis_cache.lookup, content)
+        if cached is not None:
+            logger.info(f"Analysis cache hit for {image_path.name}")
+            return {**cached, 'image_path': str(image_path)}
+        
+        # Decode the upload in memory - no temp file write and re-read
+        image = await run_in_threadpool(BaseModel.load_image, io.BytesIO(content))
+        analysis_result = await self.analysis_queue.submit(image)
+        analysis_result = {**analysis_result, 'image_path': str(image_path)}
+        
+        await run_in_threadpool(self.analysis_cache.put, cache_key, analysis_result)
+        return analysis_result
+    
+    async def submit(self, image_path: Path, content: bytes, duration: int) -> PipelineResult:
+        """Run an image through the batched analysis and generation stages"""
+        analysis_result = await self.analyze(image_path, content)
+        music_result = await self.music_queue.submit((analysis_result, duration))
+        return PipelineResult.from_stages(analysis_result, music_result)
+    
     async def process_image(self, image_file: UploadFile, duration: int = 10):
         try:
             # Generate unique filename
@@ -55,31 +300,24 @@ class SonifierService:
             image_path = UPLOAD_DIR / f"{file_id}_{image_file.filename}"
             audio_path = OUTPUT_DIR / f"{file_id}_generated.wav"
             
-            # Save uploaded file
-            with open(image_path, "wb") as buffer:
-                content = await image_file.read()
-                buffer.write(content)
+            content = await image_file.read()
             
             logger.info(f"Processing image: {image_file.filename}")
             
-            # Process with semantic sonifier
-            sonifier = self.get_sonifier()
-            result = sonifier.process_image(str(image_path), duration)
+            # Process with semantic sonifier via the batching queues
+            result = await self.submit(image_path, content, duration)
             
             # Save audio file
-            import scipy.io.wavfile as wavfile
-            audio_normalized = result['audio_array'] / np.max(np.abs(result['audio_array']))
-            wavfile.write(audio_path, result['sample_rate'], audio_normalized)
-            
-            # Cleanup uploaded image
-            image_path.unlink()
+            await run_in_threadpool(
+                save_wav, audio_path, result.audio_array, result.sample_rate
+            )
             
             return {
                 "success": True,
-                "caption": result['caption'],
-                "mood": result['primary_mood'],
-                "prompt": result['prompt_used'],
-                "duration": result['duration_seconds'],
+                "caption": result.caption,
+                "mood": result.primary_mood,
+                "prompt": result.prompt_used,
+                "duration": result.duration_seconds,
                 "audio_file": audio_path.name,
                 "file_id": file_id
             }
@@ -91,6 +329,20 @@ class SonifierService:
 # Global service instance
 sonifier_service = SonifierService()
 
+@app.on_event("startup")
+async def start_inference_worker():
+    sonifier_service.start()
+
+@app.on_event("startup")
+async def warm_up_models():
+    # Load models and compile kernels before the first request lands
+    try:
+        sonifier = sonifier_service.get_sonifier()
+        await run_in_threadpool(sonifier.warmup)
+    except Exception as e:
+        # Serve anyway - models load on first request if warm-up failed
+        logger.warning(f"Model warm-up failed, continuing without it: {e}", exc_info=True)
+
 @app.get("/")
 async def root():
     return {
@@ -118,7 +370,8 @@ async def process_image(
     
     return await sonifier_service.process_image(image, duration)
 
-@app.get("/audio/{file_id}")
+# HEAD lets clients check for the file before streaming it
+@app.api_route("/audio/{file_id}", methods=["GET", "HEAD"])
 async def get_audio(file_id: str):
     audio_path = OUTPUT_DIR / f"{file_id}_generated.wav"
     
@@ -32,9 +32,9 @@ def main():
             result = sonifier.process_image(args.image_path, args.duration)
             
             print(f"\\n🎨 Image Analysis:")
-            print(f"   Caption: {result['caption']}")
-            print(f"   Mood: {result['primary_mood']}")
-            print(f"   Prompt: {result['prompt_used']}")
+            print(f"   Caption: {result.caption}")
+            print(f"   Mood: {result.primary_mood}")
+            print(f"   Prompt: {result.prompt_used}")
             
             # Determine output path
             if args.output:
@@ -46,13 +46,11 @@ def main():
                 output_path = output_dir / f"{input_stem}_sonified.wav"
             
             # Save audio
-            from scipy.io import wavfile
-            import numpy as np
+            from src.utils.audio import save_wav
             
-            audio_normalized = result['audio_array'] / np.max(np.abs(result['audio_array']))
-            wavfile.write(output_path, result['sample_rate'], audio_normalized)
+            save_wav(output_path, result.audio_array, result.sample_rate)
             
-            print(f"\\n🎵 Generated {result['duration_seconds']:.1f}s of music")
+            print(f"\\n🎵 Generated {result.duration_seconds:.1f}s of music")
             print(f"💾 Saved to: {output_path}")
             print("\\n✅ Done!")
             
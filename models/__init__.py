@@ -2,17 +2,34 @@
 Model definitions and implementations
 """
 
-from .sonifier import SemanticSonifier
-from .base import BaseModel, PipelineComponent
-from .blip2_wrapper import BLIP2Model
-from .clip_mood_analyzer import CLIPMoodAnalyzer
-from .music_generator import MusicGenerator
+from importlib import import_module
+
+# Resolved on first attribute access so importing the package stays light
+_LAZY_IMPORTS = {
+    "SemanticSonifier": ".sonifier",
+    "PipelineResult": ".sonifier",
+    "BatchItem": ".sonifier",
+    "BaseModel": ".base",
+    "PipelineComponent": ".base",
+    "BLIP2Model": ".blip2_wrapper",
+    "CLIPMoodAnalyzer": ".clip_mood_analyzer",
+    "MusicGenerator": ".music_generator",
+}
 
 __all__ = [
     "SemanticSonifier",
+    "PipelineResult",
+    "BatchItem",
     "BaseModel", 
     "PipelineComponent",
     "BLIP2Model",
     "CLIPMoodAnalyzer", 
     "MusicGenerator"
 ]
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        value = getattr(import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,13 +3,28 @@ Base Model Architecture for Semantic Sonifier
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+import os
+from typing import Any, Dict, List, Optional, Union
+import numpy as np
 import torch
+from PIL import Image
+
+try:
+    import cv2
+except ImportError:  # Optional - falls back to the HF image processor
+    cv2 = None
 
 from src.utils.logging import logger, TimingLogger
 from src.utils.config import config
 from src.utils.device_manager import DeviceManager
 
+# Image inputs may be a file path, an already-decoded PIL image or an HxWxC array
+ImageInput = Union[str, os.PathLike, Image.Image, np.ndarray]
+
+# Results returned when captioning / mood analysis fails
+FALLBACK_CAPTION = "an image"
+FALLBACK_MOOD = "neutral"
+
 class BaseModel(ABC):
     """Abstract base class for all AI models"""
     
@@ -23,7 +38,9 @@ class BaseModel(ABC):
         
         self.model = None
         self.processor = None
+        self._pixel_lut = None
         self.logger = logger.getChild(self.__class__.__name__)
+        self.torch_dtype = self._resolve_dtype()
         
         self.logger.info(f"Initialized {model_name} on device: {self.device}")
         
@@ -37,13 +54,160 @@ class BaseModel(ABC):
         """Process input - to be implemented by subclasses"""
         pass
     
+    def _resolve_dtype(self) -> torch.dtype:
+        """Resolve weight dtype - configured half precision on GPU/MPS, fp32 on CPU"""
+        if self.device == "cpu":
+            return torch.float32
+        
+        dtype = getattr(torch, config.models.torch_dtype, torch.float16)
+        if dtype == torch.bfloat16 and self.device == "cuda" and not torch.cuda.is_bf16_supported():
+            self.logger.warning("bfloat16 not supported on this GPU, falling back to float16")
+            dtype = torch.float16
+        return dtype
+    
+    def compile_module(
+        self,
+        module: torch.nn.Module,
+        dynamic: Optional[bool] = None,
+        mode: str = "reduce-overhead"
+    ) -> torch.nn.Module:
+        """
+        Compile a (sub)module with torch.compile when running on CUDA
+        
+        Controlled by config.models.compile_models; compile_backend selects
+        inductor (default) or TensorRT when torch_tensorrt is installed.
+        mode is the inductor mode - "reduce-overhead" records CUDA graphs,
+        which only pays off for modules called with a few fixed input shapes.
+        """
+        if not config.models.compile_models or self.device != "cuda" or not hasattr(torch, "compile"):
+            return module
+        
+        module = module.eval()
+        
+        if config.models.compile_backend == "tensorrt":
+            try:
+                import torch_tensorrt  # noqa: F401 - registers the dynamo backend
+                
+                self.logger.info(f"Compiling {module.__class__.__name__} with TensorRT")
+                return torch.compile(
+                    module,
+                    backend="tensorrt",
+                    dynamic=dynamic,
+                    options={"enabled_precisions": {self.torch_dtype}}
+                )
+            except ImportError:
+                self.logger.warning("torch_tensorrt not installed - falling back to inductor")
+        
+        self.logger.info(f"Compiling {module.__class__.__name__} with torch.compile")
+        return torch.compile(module, mode=mode, fullgraph=False, dynamic=dynamic)
+    
+    @staticmethod
+    def load_image(image: ImageInput) -> Image.Image:
+        """Return an RGB PIL image, decoding from disk only when given a path"""
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        elif not isinstance(image, Image.Image):
+            image = Image.open(image)
+        # Decode now - lazy ImageFile loading is not thread-safe, and the
+        # decoded image is shared by BLIP-2 and CLIP on separate threads
+        image.load()
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        return image
+    
+    def preprocess_images(self, images: List[ImageInput], dtype: Optional[torch.dtype] = None) -> Dict:
+        """
+        Turn images into device-resident pixel_values for the vision tower
+        
+        Uses OpenCV resize plus a uint8 -> float lookup table when available,
+        following the processor's own resize/crop/normalize settings;
+        otherwise defers to the HF image processor.
+        """
+        if cv2 is None:
+            inputs = self.processor(images=images, return_tensors="pt")
+            pixel_values = inputs['pixel_values']
+        else:
+            pixel_values = torch.from_numpy(
+                np.stack([self._preprocess_cv2(image) for image in images])
+            )
+        
+        inputs = self.to_device({'pixel_values': pixel_values})
+        inputs['pixel_values'] = inputs['pixel_values'].to(dtype or self.torch_dtype)
+        return inputs
+    
+    def _preprocess_cv2(self, image: ImageInput) -> np.ndarray:
+        """Resize, center-crop and normalize one image into a float32 CHW array"""
+        image_processor = self.processor.image_processor
+        if isinstance(image, np.ndarray) and image.dtype == np.uint8 and image.ndim == 3 and image.shape[2] == 3:
+            pixels = image  # Already RGB pixels - no PIL round trip
+        else:
+            pixels = np.asarray(self.load_image(image))
+        height, width = pixels.shape[:2]
+        
+        size = image_processor.size
+        if 'shortest_edge' in size:
+            scale = size['shortest_edge'] / min(height, width)
+            new_width, new_height = round(width * scale), round(height * scale)
+        else:
+            new_width, new_height = size['width'], size['height']
+        
+        interpolation = cv2.INTER_AREA if new_width < width else cv2.INTER_CUBIC
+        pixels = cv2.resize(pixels, (new_width, new_height), interpolation=interpolation)
+        
+        if getattr(image_processor, 'do_center_crop', False):
+            crop = image_processor.crop_size
+            top = (new_height - crop['height']) // 2
+            left = (new_width - crop['width']) // 2
+            pixels = pixels[top:top + crop['height'], left:left + crop['width']]
+        
+        if self._pixel_lut is None:
+            # Rescale + normalize folded into one table per channel
+            values = np.arange(256, dtype=np.float32) * image_processor.rescale_factor
+            mean = np.asarray(image_processor.image_mean, dtype=np.float32)
+            std = np.asarray(image_processor.image_std, dtype=np.float32)
+            self._pixel_lut = (values[None, :] - mean[:, None]) / std[:, None]
+        
+        return np.stack([
+            cv2.LUT(channel, self._pixel_lut[c])
+            for c, channel in enumerate(cv2.split(pixels))
+        ])
+    
     def to_device(self, inputs: Dict) -> Dict:
-        """Move inputs to appropriate device"""
+        """Move inputs to appropriate device with non-blocking copies"""
         if hasattr(self, 'device') and self.device:
-            return {k: v.to(self.device) if hasattr(v, 'to') else v 
+            return {k: self._transfer(v) if hasattr(v, 'to') else v 
                    for k, v in inputs.items()}
         return inputs
     
+    def _transfer(self, value):
+        """Pin CPU tensors bound for CUDA so the host-to-device copy can overlap compute"""
+        if (self.device == 'cuda' and isinstance(value, torch.Tensor)
+                and value.device.type == 'cpu'):
+            value = value.pin_memory()
+        return value.to(self.device, non_blocking=True)
+    
+    def _can_offload(self) -> bool:
+        """Whether the weights can be moved between devices"""
+        if self.model is None or self.device == 'cpu':
+            return False
+        # bitsandbytes-quantized models reject .to() - they stay on the GPU
+        return not (getattr(self.model, "is_loaded_in_8bit", False)
+                    or getattr(self.model, "is_loaded_in_4bit", False))
+    
+    def offload_to_cpu(self):
+        """Move weights to host memory, keeping the model loaded"""
+        if self._can_offload():
+            self.model.to('cpu')
+            if self.device == 'cuda' and torch.cuda.is_available():
+                torch.cuda.empty_cache()
+            self.logger.debug(f"Offloaded {self.model_name} to CPU")
+    
+    def restore_to_device(self):
+        """Move offloaded weights back to the model's device"""
+        if self._can_offload():
+            self.model.to(self.device)
+            self.logger.debug(f"Restored {self.model_name} to {self.device}")
+    
     def unload_model(self):
         """Unload model to free memory"""
         if self.model is not None:
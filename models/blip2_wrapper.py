@@ -8,7 +8,7 @@ from transformers import Blip2Processor, Blip2ForConditionalGeneration
 from typing import Optional, List
 import warnings
 
-from .base import BaseModel
+from .base import BaseModel, ImageInput, FALLBACK_CAPTION
 from src.utils.config import config
 from src.utils.logging import TimingLogger
 
@@ -18,10 +18,11 @@ class BLIP2Model(BaseModel):
     Handles loading, processing, and error recovery
     """
     
-    def __init__(self, device: Optional[str] = None):
+    def __init__(self, device: Optional[str] = None, num_beams: int = 1):
         super().__init__("BLIP-2", device)
-        self.max_length = 100
-        self.num_beams = 5
+        # Short captions - greedy decoding is close to beam search quality
+        self.max_length = 30
+        self.num_beams = num_beams
         
     def load_model(self):
         """Load BLIP-2 model and processor with professional error handling"""
@@ -33,10 +34,14 @@ class BLIP2Model(BaseModel):
                 self.processor = Blip2Processor.from_pretrained(config.models.blip2_model)
                 self.model = Blip2ForConditionalGeneration.from_pretrained(
                     config.models.blip2_model,
-                    torch_dtype=torch.float16,
-                    device_map=self.device
+                    torch_dtype=self.torch_dtype,
+                    device_map=self.device,
+                    **self._quantization_kwargs()
                 )
                 
+                # generate() is not traceable - compile the fixed-shape vision tower
+                self.model.vision_model = self.compile_module(self.model.vision_model)
+                
                 self.logger.info(f"✓ {self.model_name} loaded successfully")
                 self.logger.debug(f"Model device: {self.model.device}")
                 self.logger.debug(f"Model dtype: {self.model.dtype}")
@@ -45,58 +50,75 @@ class BLIP2Model(BaseModel):
                 self.logger.error(f"Failed to load {self.model_name}: {e}")
                 raise
     
-    def process(self, image_path: str, max_length: Optional[int] = None) -> str:
+    def _quantization_kwargs(self) -> dict:
+        """Optional int8 weights via bitsandbytes (CUDA only)"""
+        if not config.models.blip2_load_in_8bit:
+            return {}
+        if self.device != "cuda":
+            self.logger.warning("8-bit BLIP-2 requires CUDA - loading unquantized weights")
+            return {}
+        
+        from transformers import BitsAndBytesConfig
+        return {"quantization_config": BitsAndBytesConfig(load_in_8bit=True)}
+    
+    def _load_image(self, image_path: ImageInput):
+        """Load and validate an image, returning None if it cannot be read"""
+        from PIL import UnidentifiedImageError
+        
+        try:
+            image = self.load_image(image_path)
+            self.logger.debug(f"Image loaded: {image.size}, mode: {image.mode}")
+            return image
+        except UnidentifiedImageError:
+            self.logger.error(f"Cannot identify image file: {image_path}")
+        except Exception as e:
+            self.logger.error(f"Error loading image {image_path}: {e}")
+        return None
+    
+    def _generate_captions(self, images: List, max_length: int) -> List[str]:
+        """Run a single generate() over a list of PIL images"""
+        inputs = self.preprocess_images(images)
+        
+        # Generate captions
+        with torch.inference_mode():
+            generated_ids = self.model.generate(
+                **inputs,
+                max_new_tokens=max_length,
+                num_beams=self.num_beams,
+                use_cache=True,
+                do_sample=False  # Deterministic for reproducibility
+            )
+        
+        # Decode captions
+        captions = self.processor.batch_decode(
+            generated_ids, 
+            skip_special_tokens=True
+        )
+        return [caption.strip() for caption in captions]
+    
+    def process(self, image_path: ImageInput, max_length: Optional[int] = None) -> str:
         """
         Generate caption for image with comprehensive error handling
         
         Args:
-            image_path: Path to input image
-            max_length: Maximum caption length
+            image_path: Path to input image or an already-loaded PIL image
+            max_length: Maximum number of new caption tokens
             
         Returns:
             Generated caption string
         """
-        from PIL import Image, UnidentifiedImageError
-        
         max_length = max_length or self.max_length
         
         try:
             # Load and validate image
             with TimingLogger("Image loading", self.logger):
-                try:
-                    image = Image.open(image_path)
-                    if image.mode != 'RGB':
-                        image = image.convert('RGB')
-                    self.logger.debug(f"Image loaded: {image.size}, mode: {image.mode}")
-                except UnidentifiedImageError:
-                    self.logger.error(f"Cannot identify image file: {image_path}")
-                    return "an image"
-                except Exception as e:
-                    self.logger.error(f"Error loading image {image_path}: {e}")
-                    return "an image"
+                image = self._load_image(image_path)
+                if image is None:
+                    return FALLBACK_CAPTION
             
             # Process image
             with TimingLogger("BLIP-2 processing", self.logger):
-                inputs = self.processor(
-                    images=image, 
-                    return_tensors="pt"
-                ).to(self.model.device, torch.float16)
-                
-                # Generate caption
-                with torch.no_grad():
-                    generated_ids = self.model.generate(
-                        **inputs,
-                        max_length=max_length,
-                        num_beams=self.num_beams,
-                        early_stopping=True,
-                        do_sample=False  # Deterministic for reproducibility
-                    )
-                
-                # Decode caption
-                caption = self.processor.batch_decode(
-                    generated_ids, 
-                    skip_special_tokens=True
-                )[0].strip()
+                caption = self._generate_captions([image], max_length)[0]
                 
                 self.logger.info(f"Generated caption: '{caption}'")
                 return caption
@@ -108,12 +130,40 @@ class BLIP2Model(BaseModel):
             raise
         except Exception as e:
             self.logger.error(f"Unexpected error in {self.model_name}: {e}")
-            return "an image"
+            return FALLBACK_CAPTION
     
-    def batch_process(self, image_paths: List[str]) -> List[str]:
-        """Process multiple images (for efficiency)"""
-        captions = []
-        for image_path in image_paths:
-            caption = self.process(image_path)
-            captions.append(caption)
+    def batch_process(self, image_paths: List[ImageInput], max_length: Optional[int] = None) -> List[str]:
+        """
+        Caption multiple images with one generate() call per sub-batch
+        
+        Sub-batches are bounded by config.models.blip2_batch_size to cap VRAM.
+        Unreadable images get the same "an image" fallback as process().
+        """
+        max_length = max_length or self.max_length
+        batch_size = config.models.blip2_batch_size
+        captions = [FALLBACK_CAPTION] * len(image_paths)
+        
+        for start in range(0, len(image_paths), batch_size):
+            chunk = image_paths[start:start + batch_size]
+            
+            with TimingLogger(f"BLIP-2 batch of {len(chunk)}", self.logger):
+                loaded = [(start + i, self._load_image(path)) for i, path in enumerate(chunk)]
+                loaded = [(idx, image) for idx, image in loaded if image is not None]
+                if not loaded:
+                    continue
+                
+                try:
+                    batch_captions = self._generate_captions(
+                        [image for _, image in loaded], max_length
+                    )
+                except RuntimeError as e:
+                    if "out of memory" in str(e):
+                        self.logger.error(f"GPU out of memory for {self.model_name} batch of {len(loaded)}")
+                        torch.cuda.empty_cache()
+                    raise
+                
+                for (idx, _), caption in zip(loaded, batch_captions):
+                    captions[idx] = caption
+        
+        self.logger.info(f"Generated {len(image_paths)} captions")
         return captions
@@ -3,12 +3,17 @@ CLIP-based Mood and Aesthetic Analyzer
 WHY: Professional emotion analysis with configurable mood tags
 """
 
+import hashlib
+import tempfile
+from pathlib import Path
+
 import torch
+import torch.nn.functional as F
 from transformers import CLIPProcessor, CLIPModel
 from typing import List, Tuple, Dict, Optional
 import numpy as np
 
-from .base import BaseModel
+from .base import BaseModel, ImageInput, FALLBACK_MOOD
 from src.utils.config import config
 from src.utils.logging import TimingLogger
 
@@ -21,100 +26,190 @@ class CLIPMoodAnalyzer(BaseModel):
     def __init__(self, device: Optional[str] = None):
         super().__init__("CLIP-Mood-Analyzer", device)
         self.mood_tags = config.models.mood_tags
+        # Tags are encoded inside a caption-like template for better zero-shot matching
+        self.mood_prompts = [
+            config.models.mood_prompt_template.format(mood=mood) for mood in self.mood_tags
+        ]
+        self.text_features = None
+        self.logit_scale = None
         
     def load_model(self):
         """Load CLIP model and processor"""
         with TimingLogger(f"Loading {self.model_name}", self.logger):
             self.processor = CLIPProcessor.from_pretrained(config.models.clip_model)
-            self.model = CLIPModel.from_pretrained(config.models.clip_model)
+            self.model = CLIPModel.from_pretrained(
+                config.models.clip_model,
+                torch_dtype=self.torch_dtype
+            )
             
             if self.device != "auto":
                 self.model = self.model.to(self.device)
+            
+            self._cache_text_features()
+            
+            # Text tower only runs once - compile the per-image vision tower
+            self.model.vision_model = self.compile_module(self.model.vision_model)
                 
             self.logger.info(f"✓ {self.model_name} loaded with {len(self.mood_tags)} mood tags")
     
-    def process(self, image_path: str, top_k: int = 3) -> Tuple[str, Dict]:
+    def _text_features_cache_path(self) -> Path:
+        """On-disk cache location keyed by model name and mood tag set"""
+        key = hashlib.md5(
+            ("|".join(self.mood_prompts) + config.models.clip_model).encode()
+        ).hexdigest()
+        return Path(tempfile.gettempdir()) / f"clip_mood_{key}.pt"
+    
+    def _cache_text_features(self):
+        """
+        Encode the mood tags once - they never change between images,
+        so inference only needs the image tower and a single matmul.
+        The encoded features are also persisted so restarts skip the text tower.
+        """
+        with torch.inference_mode():
+            self.logit_scale = self.model.logit_scale.exp()
+        
+        cache_path = self._text_features_cache_path()
+        if cache_path.exists():
+            try:
+                text_features = torch.load(cache_path, map_location=self.device, weights_only=True)
+                self.text_features = text_features.to(self.torch_dtype)
+                self.logger.debug(f"Loaded mood tag text features from {cache_path}")
+                return
+            except Exception as e:
+                self.logger.warning(f"Ignoring unreadable text feature cache {cache_path}: {e}")
+        
+        with TimingLogger("Encoding mood tag text features", self.logger):
+            text_inputs = self.processor(
+                text=self.mood_prompts,
+                return_tensors="pt",
+                padding=True
+            )
+            text_inputs = self.to_device(text_inputs)
+            
+            with torch.inference_mode():
+                text_features = self.model.get_text_features(**text_inputs)
+                self.text_features = F.normalize(text_features, dim=-1)
+        
+        try:
+            torch.save(self.text_features.float().cpu(), cache_path)
+        except OSError as e:
+            self.logger.warning(f"Could not persist text feature cache {cache_path}: {e}")
+    
+    def unload_model(self):
+        """Unload model and drop cached text features"""
+        self.text_features = None
+        self.logit_scale = None
+        super().unload_model()
+    
+    def process(self, image_path: ImageInput, top_k: int = 3) -> Tuple[str, Dict]:
         """
         Analyze image mood and aesthetic qualities
         
         Args:
-            image_path: Path to input image
+            image_path: Path to input image or an already-loaded PIL image
             top_k: Number of top moods to return
             
         Returns:
-            Tuple of (primary_mood, mood_scores_dict)
+            Tuple of (primary_mood, mood_scores_dict) - scores are not sorted
         """
-        from PIL import Image
-        
         try:
             # Load image
             with TimingLogger("Image loading for mood analysis", self.logger):
-                image = Image.open(image_path)
-                if image.mode != 'RGB':
-                    image = image.convert('RGB')
+                image = self.load_image(image_path)
             
             # Process with CLIP
             with TimingLogger("CLIP mood analysis", self.logger):
-                inputs = self.processor(
-                    text=list(self.mood_tags),
-                    images=image,
-                    return_tensors="pt",
-                    padding=True
-                )
-                
-                # Move to device
-                inputs = self.to_device(inputs)
-                
-                # Get model outputs
-                with torch.no_grad():
-                    outputs = self.model(**inputs)
-                
-                # Calculate similarities
-                logits_per_image = outputs.logits_per_image
-                probs = logits_per_image.softmax(dim=1)
-                
-                # Get top moods
-                top_probs, top_indices = torch.topk(probs[0], top_k)
-                
-                # Create results
-                mood_scores = {}
-                for prob, idx in zip(top_probs, top_indices):
-                    mood = self.mood_tags[idx]
-                    mood_scores[mood] = prob.item()
+                primary_mood, mood_scores = self._analyze([image], top_k)[0]
                 
-                primary_mood = self.mood_tags[top_indices[0]]
-                
-                self.logger.info(f"Detected mood: {primary_mood} (confidence: {top_probs[0]:.3f})")
+                self.logger.info(f"Detected mood: {primary_mood} (confidence: {mood_scores[primary_mood]:.3f})")
                 self.logger.debug(f"Top {top_k} moods: {mood_scores}")
                 
                 return primary_mood, mood_scores
                 
         except Exception as e:
             self.logger.error(f"Mood analysis failed for {image_path}: {e}")
-            return "neutral", {"neutral": 1.0}
+            return FALLBACK_MOOD, {FALLBACK_MOOD: 1.0}
     
-    def get_emotion_vector(self, image_path: str) -> np.ndarray:
+    def batch_process(self, images: List[ImageInput], top_k: int = 3) -> List[Tuple[str, Dict]]:
         """
-        Get emotional embedding vector for advanced emotion analysis
-        Useful for emotion consistency metrics later
+        Analyze the mood of several images with one image-tower forward per sub-batch
+        
+        Sub-batches are bounded by config.models.clip_batch_size to cap memory.
+        Images that cannot be loaded get the same neutral fallback as process().
         """
-        from PIL import Image
+        batch_size = config.models.clip_batch_size
+        results = [(FALLBACK_MOOD, {FALLBACK_MOOD: 1.0})] * len(images)
         
-        try:
-            image = Image.open(image_path)
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
+        for start in range(0, len(images), batch_size):
+            chunk = images[start:start + batch_size]
             
-            inputs = self.processor(images=image, return_tensors="pt")
-            inputs = self.to_device(inputs)
+            loaded = []
+            for idx, image in enumerate(chunk, start):
+                try:
+                    loaded.append((idx, self.load_image(image)))
+                except Exception as e:
+                    self.logger.error(f"Mood analysis failed for {image}: {e}")
             
-            with torch.no_grad():
-                image_features = self.model.get_image_features(**inputs)
+            if not loaded:
+                continue
+            
+            with TimingLogger(f"CLIP mood analysis batch of {len(loaded)}", self.logger):
+                try:
+                    analyses = self._analyze([image for _, image in loaded], top_k)
+                except Exception as e:
+                    self.logger.error(f"Batch mood analysis failed: {e}")
+                    continue
+            
+            for (idx, _), analysis in zip(loaded, analyses):
+                results[idx] = analysis
+        return results
+    
+    def _analyze(self, images: List, top_k: int) -> List[Tuple[str, Dict]]:
+        """Score decoded images against the cached mood tag features"""
+        # Encode images only - text features are cached at load time
+        image_features = self._encode_images(images)
+        
+        # Calculate similarities against cached mood tag features
+        logits_per_image = self.logit_scale * image_features @ self.text_features.T
+        probs = logits_per_image.float().softmax(dim=1)
+        
+        # Get top moods - consumers rank the scores themselves, so skip the sort
+        top_probs, top_indices = torch.topk(probs, top_k, dim=1, sorted=False)
+        primary_indices = probs.argmax(dim=1).tolist()
+        
+        results = []
+        for image_probs, image_indices, primary_idx in zip(
+            top_probs.tolist(), top_indices.tolist(), primary_indices
+        ):
+            mood_scores = {
+                self.mood_tags[idx]: prob
+                for prob, idx in zip(image_probs, image_indices)
+            }
+            results.append((self.mood_tags[primary_idx], mood_scores))
+        return results
+    
+    def _encode_images(self, images: List) -> torch.Tensor:
+        """Encode decoded images into normalized CLIP image features"""
+        # Preprocess straight to device in the model weight dtype
+        inputs = self.preprocess_images(images)
+        
+        with torch.inference_mode():
+            image_features = F.normalize(
+                self.model.get_image_features(**inputs), dim=-1
+            )
+        return image_features
+    
+    def get_emotion_vector(self, image_path: ImageInput) -> np.ndarray:
+        """
+        Get emotional embedding vector for advanced emotion analysis
+        Useful for emotion consistency metrics later
+        """
+        try:
+            image = self.load_image(image_path)
             
-            # Normalize features
-            image_features = image_features / image_features.norm(dim=-1, keepdim=True)
+            image_features = self._encode_images([image])
             
-            return image_features.cpu().numpy()[0]
+            return image_features.float().cpu().numpy()[0]
             
         except Exception as e:
             self.logger.error(f"Emotion vector extraction failed: {e}")
@@ -3,14 +3,93 @@ Professional MusicGen Wrapper for Music Generation
 WHY: High-quality music generation with proper audio handling
 """
 
+import threading
+from queue import Queue
 import torch
 from transformers import AutoProcessor, MusicgenForConditionalGeneration
+from transformers.generation.streamers import BaseStreamer
 import numpy as np
-from typing import Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
 
 from .base import BaseModel
 from src.utils.config import config
 from src.utils.logging import TimingLogger
+from src.utils.audio import normalize_inplace
+
+class AudioStreamer(BaseStreamer):
+    """
+    Turns MusicGen codec tokens into audio while generate() is still running
+    Every play_steps tokens the cached codes are decoded with EnCodec and the
+    newly finalized samples are queued; iterate the streamer to consume them.
+    """
+    
+    def __init__(self, model, play_steps: int, timeout: Optional[float] = None):
+        self.decoder = model.decoder
+        self.audio_encoder = model.audio_encoder
+        self.generation_config = model.generation_config
+        self.play_steps = play_steps
+        self.timeout = timeout
+        
+        # Hold back the tail of each decode - it changes once later frames arrive
+        hop_length = int(np.prod(self.audio_encoder.config.upsampling_ratios))
+        self.stride = max(hop_length * (play_steps - self.decoder.num_codebooks) // 6, 1)
+        
+        self.token_cache = None
+        self.to_yield = 0
+        self.audio_queue = Queue()
+        self.stop_signal = object()
+    
+    def put(self, value: torch.Tensor):
+        """Receive the next decoder step from generate()"""
+        if value.shape[0] // self.decoder.num_codebooks > 1:
+            raise ValueError("AudioStreamer only supports a single prompt")
+        
+        if self.token_cache is None:
+            self.token_cache = value
+        else:
+            self.token_cache = torch.cat([self.token_cache, value[:, None]], dim=-1)
+        
+        if self.token_cache.shape[-1] % self.play_steps == 0:
+            audio_values = self._decode_tokens()
+            self.audio_queue.put(audio_values[self.to_yield:-self.stride])
+            self.to_yield = len(audio_values) - self.stride
+    
+    def end(self):
+        """Flush the remaining samples once generation finishes"""
+        if self.token_cache is not None:
+            self.audio_queue.put(self._decode_tokens()[self.to_yield:])
+        self.audio_queue.put(self.stop_signal)
+    
+    def fail(self, error: Exception):
+        """Hand a generation error over to the consuming thread"""
+        self.audio_queue.put(error)
+    
+    def _decode_tokens(self) -> np.ndarray:
+        """Undo the codebook delay pattern and decode the cached codes to audio"""
+        input_ids = self.token_cache
+        _, delay_pattern_mask = self.decoder.build_delay_pattern_mask(
+            input_ids[:, :1],
+            pad_token_id=self.generation_config.decoder_start_token_id,
+            max_length=input_ids.shape[-1],
+        )
+        input_ids = self.decoder.apply_delay_pattern_mask(input_ids, delay_pattern_mask)
+        input_ids = input_ids[input_ids != self.generation_config.pad_token_id]
+        input_ids = input_ids.reshape(1, 1, self.decoder.num_codebooks, -1).to(self.audio_encoder.device)
+        
+        with torch.inference_mode():
+            audio_values = self.audio_encoder.decode(input_ids, audio_scales=[None]).audio_values
+        return audio_values[0, 0].float().cpu().numpy()
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self) -> np.ndarray:
+        value = self.audio_queue.get(timeout=self.timeout)
+        if value is self.stop_signal:
+            raise StopIteration()
+        if isinstance(value, Exception):
+            raise value
+        return value
 
 class MusicGenerator(BaseModel):
     """
@@ -22,19 +101,41 @@ class MusicGenerator(BaseModel):
         super().__init__("MusicGen", device)
         self.sample_rate = config.audio.sample_rate
         self.default_duration = config.audio.default_duration
+        self.frame_rate = None
         
     def load_model(self):
         """Load MusicGen model and processor"""
         with TimingLogger(f"Loading {self.model_name}", self.logger):
             self.processor = AutoProcessor.from_pretrained(config.models.musicgen_model)
+            # Input ids stay integer - only the weights are cast
             self.model = MusicgenForConditionalGeneration.from_pretrained(
-                config.models.musicgen_model
+                config.models.musicgen_model,
+                torch_dtype=self.torch_dtype
             )
             
             if self.device != "auto":
                 self.model = self.model.to(self.device)
+            
+            # Compile only the decoder; dynamic shapes follow the growing KV cache
+            # instead of recompiling for every sequence length. No CUDA graphs -
+            # they would record a new graph for every KV cache length
+            self.model.decoder = self.compile_module(
+                self.model.decoder, dynamic=None, mode="max-autotune-no-cudagraphs"
+            )
+            
+            # One decoder step per EnCodec frame
+            self.frame_rate = self.model.config.audio_encoder.frame_rate
+            
+            # Sampling settings are fixed, so set them once on the generation config
+            generation_config = self.model.generation_config
+            generation_config.do_sample = True  # Creative variation
+            generation_config.top_k = 250
+            generation_config.temperature = 1.0
+            generation_config.guidance_scale = 3.0  # Classifier-free guidance toward the prompt
+            generation_config.use_cache = True
                 
             self.logger.info(f"✓ {self.model_name} loaded with sample rate {self.sample_rate}")
+            self.logger.debug(f"Model dtype: {self.model.dtype}")
     
     def process(self, prompt: str, duration: Optional[int] = None) -> Tuple[np.ndarray, int]:
         """
@@ -47,38 +148,11 @@ class MusicGenerator(BaseModel):
         Returns:
             Tuple of (audio_array, sample_rate)
         """
-        duration = duration or self.default_duration
+        duration = self._clamp_duration(duration or self.default_duration)
         
         try:
             with TimingLogger(f"Music generation: '{prompt}'", self.logger):
-                # Validate duration
-                if duration > config.audio.max_duration:
-                    self.logger.warning(f"Duration {duration}s exceeds max {config.audio.max_duration}s")
-                    duration = config.audio.max_duration
-                
-                # Calculate tokens for duration (approximate)
-                max_new_tokens = int(duration * 50)  # Rough conversion
-                
-                # Prepare inputs
-                inputs = self.processor(
-                    text=[prompt],
-                    padding=True,
-                    return_tensors="pt",
-                )
-                
-                inputs = self.to_device(inputs)
-                
-                # Generate audio
-                with torch.no_grad():
-                    audio_values = self.model.generate(
-                        **inputs,
-                        max_new_tokens=max_new_tokens,
-                        do_sample=True,  # Creative variation
-                        temperature=0.8,  # Balance creativity/consistency
-                    )
-                
-                # Extract audio
-                audio_array = audio_values[0, 0].cpu().numpy().astype(np.float32)
+                audio_array = self._generate([prompt], duration)[0]
                 
                 self.logger.info(f"Generated {len(audio_array)/self.sample_rate:.1f}s audio for: '{prompt}'")
                 
@@ -98,18 +172,128 @@ class MusicGenerator(BaseModel):
             self.logger.error(f"Music generation failed: {e}")
             raise
     
+    def batch_process(self, prompts: List[str], duration: Optional[int] = None) -> List[Tuple[np.ndarray, int]]:
+        """
+        Generate music for several prompts sharing one duration
+        
+        Prompts are padded into one generate() call per sub-batch of
+        config.audio.batch_size to bound memory.
+        """
+        duration = self._clamp_duration(duration or self.default_duration)
+        batch_size = config.audio.batch_size
+        results = []
+        
+        for start in range(0, len(prompts), batch_size):
+            chunk = prompts[start:start + batch_size]
+            with TimingLogger(f"Music generation batch of {len(chunk)}", self.logger):
+                try:
+                    audio_arrays = self._generate(chunk, duration)
+                except RuntimeError as e:
+                    if "out of memory" in str(e):
+                        self.logger.error(f"GPU out of memory during music generation batch of {len(chunk)}")
+                        torch.cuda.empty_cache()
+                    raise
+            results.extend((audio_array, self.sample_rate) for audio_array in audio_arrays)
+        
+        return results
+    
+    def stream(self, prompt: str, duration: Optional[int] = None,
+               chunk_seconds: float = 1.0) -> Iterator[np.ndarray]:
+        """
+        Generate music from a text prompt, yielding audio as it is decoded
+        
+        generate() runs on a background thread; roughly every chunk_seconds of
+        generated tokens a float32 chunk is yielded, so callers can write or
+        play audio before the whole clip is finished.
+        """
+        duration = self._clamp_duration(duration or self.default_duration)
+        # EnCodec needs a few frames beyond the codebook delay per decode
+        play_steps = max(int(chunk_seconds * self.frame_rate), self.model.decoder.num_codebooks + 1)
+        streamer = AudioStreamer(self.model, play_steps)
+        
+        inputs = self.to_device(self.processor(text=[prompt], padding=True, return_tensors="pt"))
+        
+        def run_generation():
+            try:
+                with torch.inference_mode():
+                    self.model.generate(
+                        **inputs,
+                        max_new_tokens=int(duration * self.frame_rate),
+                        streamer=streamer
+                    )
+            except Exception as e:
+                streamer.fail(e)
+        
+        thread = threading.Thread(target=run_generation, name="MusicGenStream", daemon=True)
+        
+        with TimingLogger(f"Streaming music generation: '{prompt}'", self.logger):
+            thread.start()
+            remaining = int(duration * self.sample_rate)
+            for chunk in streamer:
+                if remaining <= 0:
+                    break
+                chunk = np.ascontiguousarray(chunk[:remaining], dtype=np.float32)
+                remaining -= len(chunk)
+                yield chunk
+            thread.join()
+    
+    def _clamp_duration(self, duration: int) -> int:
+        """Validate duration against the configured maximum"""
+        if duration > config.audio.max_duration:
+            self.logger.warning(f"Duration {duration}s exceeds max {config.audio.max_duration}s")
+            return config.audio.max_duration
+        return duration
+    
+    def _generate(self, prompts: List[str], duration: int) -> List[np.ndarray]:
+        """Run one padded generate() over a list of prompts"""
+        # Calculate tokens for duration
+        max_new_tokens = int(duration * self.frame_rate)
+        
+        # Prepare inputs - padding plus attention mask for mixed prompt lengths
+        inputs = self.processor(
+            text=prompts,
+            padding=True,
+            return_tensors="pt",
+        )
+        
+        inputs = self.to_device(inputs)
+        
+        # Generate audio
+        with torch.inference_mode():
+            audio_values = self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens
+            )
+        
+        # Extract audio, trimmed to the requested duration
+        num_samples = int(duration * self.sample_rate)
+        # .float() already yields float32 - no extra astype copy
+        audio_values = audio_values[:, 0, :num_samples].float().cpu().numpy()
+        return list(audio_values)
+    
     def normalize_audio(self, audio_array: np.ndarray) -> np.ndarray:
-        """Normalize audio to prevent clipping"""
-        max_val = np.max(np.abs(audio_array))
-        if max_val > 0:
-            return audio_array / max_val
-        return audio_array
+        """Normalize audio in place to prevent clipping"""
+        return normalize_inplace(audio_array)
     
     def generate_with_emotion(self, prompt: str, mood: str, duration: Optional[int] = None) -> Tuple[np.ndarray, int]:
         """
         Enhanced generation with emotional context
         """
-        enhanced_prompt = f"A {mood} piece of music, {prompt}"
+        enhanced_prompt = self._emotion_prompt(prompt, mood)
         self.logger.debug(f"Enhanced prompt with emotion: {enhanced_prompt}")
         
         return self.process(enhanced_prompt, duration)
+    
+    def generate_with_emotion_batch(self, prompts: List[str], moods: List[str],
+                                    duration: Optional[int] = None) -> List[Tuple[np.ndarray, int]]:
+        """Batched variant of generate_with_emotion"""
+        enhanced_prompts = [self._emotion_prompt(prompt, mood) for prompt, mood in zip(prompts, moods)]
+        return self.batch_process(enhanced_prompts, duration)
+    
+    def stream_with_emotion(self, prompt: str, mood: str, duration: Optional[int] = None,
+                            chunk_seconds: float = 1.0) -> Iterator[np.ndarray]:
+        """Streaming variant of generate_with_emotion"""
+        return self.stream(self._emotion_prompt(prompt, mood), duration, chunk_seconds)
+    
+    def _emotion_prompt(self, prompt: str, mood: str) -> str:
+        return f"A {mood} piece of music, {prompt}"
@@ -3,17 +3,146 @@ Main Semantic Sonifier Class - The Core Orchestrator
 WHY: Ties all components together with professional pipeline management
 """
 
-from typing import Dict, Any, Optional, Tuple
+import heapq
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import combinations
+from operator import itemgetter
+from typing import Callable, Dict, Any, List, Optional, Tuple, Union
 import numpy as np
-from pathlib import Path
 
-from .blip2_wrapper import BLIP2Model
-from .clip_mood_analyzer import CLIPMoodAnalyzer
-from .music_generator import MusicGenerator
-from .base import PipelineComponent
+# Model wrappers (and transformers) are imported on first use to keep imports light
+from .base import BaseModel, ImageInput, PipelineComponent
 from src.utils.config import config
 from src.utils.logging import logger, TimingLogger
 
+# Caption keywords that identify a scene category
+SCENE_KEYWORDS = {
+    # Nature scenes
+    'forest': 'nature', 'mountain': 'nature', 'ocean': 'nature',
+    'river': 'nature', 'nature': 'nature',
+    # Urban scenes
+    'city': 'urban', 'building': 'urban', 'street': 'urban', 'urban': 'urban',
+    # People/portraits
+    'person': 'people', 'people': 'people', 'portrait': 'people', 'face': 'people',
+}
+
+# Categories are checked in this order when a caption matches several
+SCENE_PRIORITY = ('nature', 'urban', 'people')
+
+# (scene category, mood) -> genre/instrument hint
+GENRE_HINTS = {
+    ('nature', 'peaceful'): "ambient pads and gentle flutes",
+    ('nature', 'serene'): "ambient pads and gentle flutes",
+    ('nature', 'calm'): "ambient pads and gentle flutes",
+    ('nature', 'dramatic'): "epic orchestral strings and horns",
+    ('nature', 'intense'): "epic orchestral strings and horns",
+    ('urban', 'energetic'): "electronic beats and synth bass",
+    ('urban', 'chaotic'): "electronic beats and synth bass",
+    ('urban', 'melancholic'): "slow piano and distant city sounds",
+    ('urban', 'somber'): "slow piano and distant city sounds",
+    ('people', 'happy'): "upbeat acoustic guitar and light percussion",
+    ('people', 'joyful'): "upbeat acoustic guitar and light percussion",
+    ('people', 'mysterious'): "ethereal vocals and reverbed textures",
+    ('people', 'dreamy'): "ethereal vocals and reverbed textures",
+}
+
+def _specialize_genre_hints() -> Dict[Tuple[frozenset, str], str]:
+    """
+    Partially evaluate the priority walk over GENRE_HINTS
+    Maps every (set of matched scene categories, mood) to its final hint,
+    so a lookup needs no branching over SCENE_PRIORITY at runtime
+    """
+    moods = {mood for _, mood in GENRE_HINTS}
+    table = {}
+    for size in range(1, len(SCENE_PRIORITY) + 1):
+        # combinations() keeps SCENE_PRIORITY order, so the first hit wins
+        for categories in combinations(SCENE_PRIORITY, size):
+            for mood in moods:
+                for category in categories:
+                    hint = GENRE_HINTS.get((category, mood))
+                    if hint:
+                        table[(frozenset(categories), mood)] = hint
+                        break
+    return table
+
+# (frozenset of scene categories, mood) -> genre/instrument hint
+_GENRE_HINT_TABLE = _specialize_genre_hints()
+
+# Substring semantics match the keyword lists above ("forests" hits "forest");
+# the zero-width lookahead also finds overlapping keywords ("forestreet")
+_SCENE_PATTERN = re.compile(
+    "(?=(" + "|".join(map(re.escape, SCENE_KEYWORDS)) + "))", re.IGNORECASE
+)
+
+def _is_path(image: ImageInput) -> bool:
+    """Whether an image input refers to a file (str or os.PathLike)"""
+    return isinstance(image, (str, os.PathLike))
+
+def _source_path(image: ImageInput) -> Optional[str]:
+    """File path an image came from, or None for in-memory images"""
+    return os.fspath(image) if _is_path(image) else None
+
+def _image_size(image_path: Union[str, os.PathLike]) -> Optional[int]:
+    """Size in bytes of an image file via one os.stat call, or None if it is missing"""
+    try:
+        return os.stat(image_path).st_size
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+def _describe(image: ImageInput) -> str:
+    """Short log label for an image input"""
+    return os.fspath(image) if _is_path(image) else f"in-memory {type(image).__name__}"
+
+@dataclass
+class PipelineResult:
+    """Complete output of one image-to-music run"""
+    __slots__ = (
+        'caption', 'primary_mood', 'mood_scores', 'image_path',
+        'audio_array', 'sample_rate', 'prompt_used', 'duration_seconds'
+    )
+    caption: str
+    primary_mood: str
+    mood_scores: Dict[str, float]
+    image_path: Optional[str]
+    audio_array: np.ndarray
+    sample_rate: int
+    prompt_used: str
+    duration_seconds: float
+    
+    @classmethod
+    def from_stages(cls, analysis_result: Dict[str, Any], music_result: Dict[str, Any]) -> 'PipelineResult':
+        """Combine the image analysis and music generation stage outputs"""
+        return cls(
+            caption=analysis_result['caption'],
+            primary_mood=analysis_result['primary_mood'],
+            mood_scores=analysis_result['mood_scores'],
+            image_path=analysis_result['image_path'],
+            audio_array=music_result['audio_array'],
+            sample_rate=music_result['sample_rate'],
+            prompt_used=music_result['prompt_used'],
+            duration_seconds=music_result['duration_seconds']
+        )
+
+@dataclass
+class BatchItem:
+    """Outcome of one image in SemanticSonifier.batch_process"""
+    __slots__ = ('path', 'ok', 'result', 'error')
+    path: Optional[str]
+    ok: bool
+    result: Optional[PipelineResult]
+    error: Optional[str]
+
+def _fail_items(items: List[BatchItem], indices: List[int], error: str) -> List[BatchItem]:
+    """Mark the given batch items as failed with a shared error"""
+    for idx in indices:
+        items[idx].error = error
+    return items
+
 class ImageAnalyzer(PipelineComponent):
     """Pipeline component for comprehensive image analysis"""
     
@@ -21,42 +150,134 @@ class ImageAnalyzer(PipelineComponent):
         super().__init__("ImageAnalyzer")
         self.blip_model = None
         self.clip_analyzer = None
+        # BLIP-2 and CLIP are independent given the image - run them side by side
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ImageAnalyzer")
+        self._streams = None
     
-    def process(self, image_path: str) -> Dict[str, Any]:
+    def process(self, image_path: ImageInput) -> Dict[str, Any]:
         """
         Comprehensive image analysis combining BLIP-2 and CLIP
         
+        Args:
+            image_path: Path to an image, or an already-decoded PIL image / array
+        
         Returns:
             Dictionary with caption, mood, and analysis metadata
         """
-        self.logger.info(f"Analyzing image: {image_path}")
+        self.logger.info(f"Analyzing image: {_describe(image_path)}")
         
-        # Initialize models if needed
-        if self.blip_model is None:
-            self.blip_model = BLIP2Model()
-            self.blip_model.load_model()
+        self._ensure_models()
         
-        if self.clip_analyzer is None:
-            self.clip_analyzer = CLIPMoodAnalyzer()
-            self.clip_analyzer.load_model()
+        # Decode once and share the image between both models
+        image = self._decode(image_path)
         
-        # Get image understanding
-        caption = self.blip_model.process(image_path)
-        primary_mood, mood_scores = self.clip_analyzer.process(image_path)
+        # Get image understanding - captioning overlaps mood analysis
+        caption_future = self._executor.submit(self._run_on_stream, 0, self.blip_model.process, image)
+        primary_mood, mood_scores = self._run_on_stream(1, self.clip_analyzer.process, image)
+        caption = caption_future.result()
         
         return {
             'caption': caption,
             'primary_mood': primary_mood,
             'mood_scores': mood_scores,
-            'image_path': image_path
+            'image_path': _source_path(image_path)
         }
     
+    def process_batch(self, image_paths: List[ImageInput]) -> List[Dict[str, Any]]:
+        """
+        Analyze several images with batched BLIP-2 and CLIP forwards
+        
+        Returns:
+            List of analysis dictionaries in the same order as image_paths
+        """
+        self.logger.info(f"Analyzing batch of {len(image_paths)} images")
+        
+        self._ensure_models()
+        
+        # Decode and analyze one chunk at a time so only a chunk of images is held in memory;
+        # each model further splits the chunk into its own sub-batches
+        chunk_size = max(config.models.blip2_batch_size, config.models.clip_batch_size)
+        
+        results = []
+        for start in range(0, len(image_paths), chunk_size):
+            chunk = image_paths[start:start + chunk_size]
+            images = [self._decode(image_path) for image_path in chunk]
+            captions_future = self._executor.submit(self._run_on_stream, 0, self.blip_model.batch_process, images)
+            moods = self._run_on_stream(1, self.clip_analyzer.batch_process, images)
+            captions = captions_future.result()
+            
+            for image_path, caption, (primary_mood, mood_scores) in zip(chunk, captions, moods):
+                results.append({
+                    'caption': caption,
+                    'primary_mood': primary_mood,
+                    'mood_scores': mood_scores,
+                    'image_path': _source_path(image_path)
+                })
+        return results
+    
+    def _decode(self, image_path: ImageInput):
+        """
+        Decode an image once for all models
+        Falls back to the path so each model applies its own error fallback
+        """
+        try:
+            return BaseModel.load_image(image_path)
+        except Exception as e:
+            self.logger.warning(f"Could not decode {_describe(image_path)}: {e}")
+            return image_path
+    
+    def create_models(self):
+        """Instantiate the model wrappers without loading their weights"""
+        if self.blip_model is None:
+            from .blip2_wrapper import BLIP2Model
+            self.blip_model = BLIP2Model()
+        
+        if self.clip_analyzer is None:
+            from .clip_mood_analyzer import CLIPMoodAnalyzer
+            self.clip_analyzer = CLIPMoodAnalyzer()
+    
+    def _ensure_models(self):
+        """Initialize models if needed"""
+        self.create_models()
+        
+        for model in (self.blip_model, self.clip_analyzer):
+            if model.model is None:
+                model.load_model()
+        
+        if self._streams is None and self.clip_analyzer.device == "cuda":
+            import torch
+            self._streams = (torch.cuda.Stream(), torch.cuda.Stream())
+    
+    def _run_on_stream(self, index: int, fn: Callable, *args):
+        """Run a model call on its own CUDA stream so GPU work can overlap"""
+        if self._streams is None:
+            return fn(*args)
+        
+        import torch
+        stream = self._streams[index]
+        with torch.cuda.stream(stream):
+            result = fn(*args)
+        stream.synchronize()
+        return result
+    
     def unload_models(self):
         """Unload models to free memory"""
         if self.blip_model:
             self.blip_model.unload_model()
         if self.clip_analyzer:
             self.clip_analyzer.unload_model()
+    
+    def offload_models(self):
+        """Move BLIP-2 and CLIP weights to CPU to free VRAM"""
+        for model in (self.blip_model, self.clip_analyzer):
+            if model:
+                model.offload_to_cpu()
+    
+    def restore_models(self):
+        """Move BLIP-2 and CLIP weights back to their devices"""
+        for model in (self.blip_model, self.clip_analyzer):
+            if model:
+                model.restore_to_device()
 
 class MusicOrchestrator(PipelineComponent):
     """Pipeline component for intelligent music generation"""
@@ -74,9 +295,7 @@ class MusicOrchestrator(PipelineComponent):
         """
         self.logger.info("Orchestrating music generation...")
         
-        if self.music_generator is None:
-            self.music_generator = MusicGenerator()
-            self.music_generator.load_model()
+        self._ensure_model()
         
         # Intelligent prompt engineering - THIS IS OUR SECRET SAUCE
         prompt = self._create_intelligent_prompt(
@@ -91,6 +310,8 @@ class MusicOrchestrator(PipelineComponent):
             mood=analysis_result['primary_mood'],
             duration=duration
         )
+        # Keep audio float32 and C-contiguous so downstream math never upcasts to float64
+        audio_array = np.ascontiguousarray(audio_array, dtype=np.float32)
         
         return {
             'audio_array': audio_array,
@@ -99,56 +320,121 @@ class MusicOrchestrator(PipelineComponent):
             'duration_seconds': len(audio_array) / sample_rate
         }
     
+    def process_stream(self, analysis_result: Dict[str, Any], duration: Optional[int] = None,
+                       chunk_seconds: float = 1.0) -> Dict[str, Any]:
+        """
+        Start streaming music generation for one image analysis
+        
+        Returns:
+            Dictionary with the prompt, sample rate and an iterator of audio chunks
+        """
+        self.logger.info("Orchestrating streaming music generation...")
+        
+        self._ensure_model()
+        
+        prompt = self._create_intelligent_prompt(
+            analysis_result['caption'],
+            analysis_result['primary_mood'],
+            analysis_result['mood_scores']
+        )
+        
+        return {
+            'audio_chunks': self.music_generator.stream_with_emotion(
+                prompt=prompt,
+                mood=analysis_result['primary_mood'],
+                duration=duration,
+                chunk_seconds=chunk_seconds
+            ),
+            'sample_rate': self.music_generator.sample_rate,
+            'prompt_used': prompt
+        }
+    
+    def process_batch(self, analysis_results: List[Dict[str, Any]],
+                      duration: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Generate music for several analyses with batched MusicGen calls
+        
+        Returns:
+            List of music dictionaries in the same order as analysis_results
+        """
+        self.logger.info(f"Orchestrating music generation for {len(analysis_results)} images...")
+        
+        self._ensure_model()
+        
+        prompts = [
+            self._create_intelligent_prompt(
+                analysis_result['caption'],
+                analysis_result['primary_mood'],
+                analysis_result['mood_scores']
+            )
+            for analysis_result in analysis_results
+        ]
+        
+        generated = self.music_generator.generate_with_emotion_batch(
+            prompts=prompts,
+            moods=[analysis_result['primary_mood'] for analysis_result in analysis_results],
+            duration=duration
+        )
+        
+        results = []
+        for prompt, (audio_array, sample_rate) in zip(prompts, generated):
+            audio_array = np.ascontiguousarray(audio_array, dtype=np.float32)
+            results.append({
+                'audio_array': audio_array,
+                'sample_rate': sample_rate,
+                'prompt_used': prompt,
+                'duration_seconds': len(audio_array) / sample_rate
+            })
+        return results
+    
+    def create_model(self):
+        """Instantiate the MusicGen wrapper without loading its weights"""
+        if self.music_generator is None:
+            from .music_generator import MusicGenerator
+            self.music_generator = MusicGenerator()
+    
+    def _ensure_model(self):
+        """Initialize MusicGen if needed"""
+        self.create_model()
+        if self.music_generator.model is None:
+            self.music_generator.load_model()
+    
     def _create_intelligent_prompt(self, caption: str, primary_mood: str, mood_scores: Dict) -> str:
         """
         Create intelligent music prompt using our custom rules
         This is where the magic happens!
         """
         # Base structure
-        prompt_parts = [f"A {primary_mood} piece of music for {caption}"]
+        final_prompt = f"A {primary_mood} piece of music for {caption}"
         
-        # Enhanced mood context based on confidence
-        top_moods = list(mood_scores.keys())[:2]  # Top 2 moods
-        if len(top_moods) > 1 and mood_scores[top_moods[1]] > 0.2:
-            prompt_parts.append(f"with elements of {top_moods[1]}")
+        # Enhanced mood context based on confidence - mood_scores is unordered
+        top_moods = heapq.nlargest(2, mood_scores.items(), key=itemgetter(1))
+        if len(top_moods) > 1 and top_moods[1][1] > 0.2:
+            final_prompt = f"{final_prompt}, with elements of {top_moods[1][0]}"
         
         # Genre/instrument hints based on content and mood
         genre_hint = self._get_genre_hint(caption, primary_mood)
         if genre_hint:
-            prompt_parts.append(genre_hint)
+            final_prompt = f"{final_prompt}, {genre_hint}"
         
-        final_prompt = ", ".join(prompt_parts)
         self.logger.debug(f"Intelligent prompt created: {final_prompt}")
         
         return final_prompt
     
     def _get_genre_hint(self, caption: str, mood: str) -> str:
         """Add intelligent genre/instrument hints based on content"""
-        caption_lower = caption.lower()
-        mood_lower = mood.lower()
-        
-        # Nature scenes
-        if any(word in caption_lower for word in ['forest', 'mountain', 'ocean', 'river', 'nature']):
-            if mood_lower in ['peaceful', 'serene', 'calm']:
-                return "ambient pads and gentle flutes"
-            elif mood_lower in ['dramatic', 'intense']:
-                return "epic orchestral strings and horns"
-        
-        # Urban scenes
-        if any(word in caption_lower for word in ['city', 'building', 'street', 'urban']):
-            if mood_lower in ['energetic', 'chaotic']:
-                return "electronic beats and synth bass"
-            elif mood_lower in ['melancholic', 'somber']:
-                return "slow piano and distant city sounds"
-        
-        # People/portraits
-        if any(word in caption_lower for word in ['person', 'people', 'portrait', 'face']):
-            if mood_lower in ['happy', 'joyful']:
-                return "upbeat acoustic guitar and light percussion"
-            elif mood_lower in ['mysterious', 'dreamy']:
-                return "ethereal vocals and reverbed textures"
-        
-        return ""
+        return self._genre_hint_cached(caption.lower(), mood.lower())
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _genre_hint_cached(caption_lower: str, mood_lower: str) -> str:
+        """Pure caption/mood -> hint lookup, memoized for recurring captions"""
+        # One scan of the caption finds every scene category, one dict get picks the hint
+        categories = frozenset(
+            SCENE_KEYWORDS[match.group(1)]
+            for match in _SCENE_PATTERN.finditer(caption_lower)
+        )
+        return _GENRE_HINT_TABLE.get((categories, mood_lower), "")
 
 class SemanticSonifier:
     """
@@ -162,20 +448,70 @@ class SemanticSonifier:
         self.music_orchestrator = MusicOrchestrator()
         self._is_initialized = False
     
-    def initialize(self):
-        """Initialize all components"""
+    def initialize(self, preload: bool = False):
+        """
+        Initialize all components
+        
+        Args:
+            preload: Load BLIP-2, CLIP and MusicGen now, in parallel,
+                instead of on first use
+        """
         if not self._is_initialized:
             self.logger.info("Initializing Semantic Sonifier...")
             # Models will be loaded on-demand to save memory
             self._is_initialized = True
             self.logger.info("✓ Semantic Sonifier initialized")
+        
+        if preload:
+            self._preload_models()
+    
+    def _preload_models(self):
+        """
+        Load every model that is not loaded yet concurrently
+        Hub downloads and weight transfers overlap instead of running back to back
+        """
+        self.image_analyzer.create_models()
+        self.music_orchestrator.create_model()
+        
+        pending = [
+            model for model in (
+                self.image_analyzer.blip_model,
+                self.image_analyzer.clip_analyzer,
+                self.music_orchestrator.music_generator
+            )
+            if model.model is None
+        ]
+        if not pending:
+            return
+        
+        with TimingLogger(f"Parallel preload of {len(pending)} models", self.logger):
+            with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="ModelPreload") as executor:
+                futures = [executor.submit(model.load_model) for model in pending]
+            # Surface the first load failure to the caller
+            for future in futures:
+                future.result()
     
-    def process_image(self, image_path: str, duration: Optional[int] = None) -> Dict[str, Any]:
+    def warmup(self):
+        """
+        Load all models and run one tiny pass through each
+        Triggers torch.compile and cuDNN autotuning before real requests arrive
+        """
+        from PIL import Image
+        
+        self.initialize(preload=True)
+        
+        with TimingLogger("Semantic Sonifier warm-up", self.logger):
+            dummy_image = Image.new('RGB', (224, 224))
+            analysis_result = self.image_analyzer.process(dummy_image)
+            self.music_orchestrator.process(analysis_result, duration=1)
+    
+    def process_image(self, image_path: ImageInput, duration: Optional[int] = None) -> PipelineResult:
         """
         Main pipeline: Convert image to music with emotional intelligence
         
         Args:
-            image_path: Path to input image
+            image_path: Path to input image, or an already-decoded PIL image /
+                RGB array - in-memory images skip the disk read and decode
             duration: Duration of generated music in seconds
             
         Returns:
@@ -184,40 +520,113 @@ class SemanticSonifier:
         self.initialize()
         
         with TimingLogger("Semantic Sonification", self.logger):
-            # Validate input
-            if not Path(image_path).exists():
+            # Validate input - a single stat call, no Path object
+            if _is_path(image_path) and _image_size(image_path) is None:
                 raise FileNotFoundError(f"Image not found: {image_path}")
             
             # Step 1: Analyze image
             analysis_result = self.image_analyzer.safe_process(image_path)
             
             # Step 2: Generate music
-            music_result = self.music_orchestrator.safe_process(
-                analysis_result, 
-                duration or config.audio.default_duration
-            )
+            with self._vram_for_music():
+                music_result = self.music_orchestrator.safe_process(
+                    analysis_result, 
+                    duration or config.audio.default_duration
+                )
             
             # Combine results
-            final_result = {**analysis_result, **music_result}
+            final_result = PipelineResult.from_stages(analysis_result, music_result)
             
             self.logger.info(
-                f"Successfully generated {final_result['duration_seconds']:.1f}s "
+                f"Successfully generated {final_result.duration_seconds:.1f}s "
                 f"of {analysis_result['primary_mood']} music for: {analysis_result['caption']}"
             )
             
             return final_result
     
-    def batch_process(self, image_paths: list, duration: Optional[int] = None) -> list:
-        """Process multiple images"""
-        results = []
-        for image_path in image_paths:
+    def stream_image(self, image_path: ImageInput, duration: Optional[int] = None,
+                     chunk_seconds: float = 1.0) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Analyze an image, then stream its music as it is generated
+        
+        Returns:
+            Tuple of (analysis result, music stream) - iterate the stream's
+            'audio_chunks' to receive float32 audio roughly every chunk_seconds
+        """
+        self.initialize()
+        
+        if _is_path(image_path) and _image_size(image_path) is None:
+            raise FileNotFoundError(f"Image not found: {image_path}")
+        
+        analysis_result = self.image_analyzer.safe_process(image_path)
+        music_stream = self.music_orchestrator.process_stream(
+            analysis_result,
+            duration or config.audio.default_duration,
+            chunk_seconds
+        )
+        return analysis_result, music_stream
+    
+    def batch_process(self, image_paths: List[ImageInput], duration: Optional[int] = None) -> List['BatchItem']:
+        """
+        Process multiple images with batched analysis and generation forwards
+        
+        Returns:
+            One BatchItem per input, in input order, carrying either the
+            PipelineResult or the reason the image failed
+        """
+        self.initialize()
+        duration = duration or config.audio.default_duration
+        items = [BatchItem(_source_path(image_path), False, None, None) for image_path in image_paths]
+        
+        valid = []
+        for idx, image_path in enumerate(image_paths):
+            if not _is_path(image_path) or _image_size(image_path) is not None:
+                valid.append(idx)
+            else:
+                items[idx].error = "Image not found"
+                self.logger.error(f"Failed to process {image_path}: Image not found")
+        
+        if not valid:
+            return items
+        
+        with TimingLogger(f"Semantic Sonification batch of {len(valid)}", self.logger):
             try:
-                result = self.process_image(image_path, duration)
-                results.append(result)
-            except Exception as e:
-                self.logger.error(f"Failed to process {image_path}: {e}")
-                results.append(None)
-        return results
+                analyses = self.image_analyzer.process_batch([image_paths[idx] for idx in valid])
+            except (RuntimeError, OSError, ValueError) as e:
+                self.logger.error(f"Batch image analysis failed: {e}", exc_info=True)
+                return _fail_items(items, valid, f"Image analysis failed: {e}")
+            
+            with self._vram_for_music():
+                try:
+                    music_results = self.music_orchestrator.process_batch(analyses, duration)
+                except (RuntimeError, OSError, ValueError) as e:
+                    self.logger.error(f"Batch music generation failed: {e}", exc_info=True)
+                    return _fail_items(items, valid, f"Music generation failed: {e}")
+            
+            for idx, analysis_result, music_result in zip(valid, analyses, music_results):
+                items[idx].ok = True
+                items[idx].result = PipelineResult.from_stages(analysis_result, music_result)
+        
+        return items
+    
+    @contextmanager
+    def _vram_for_music(self):
+        """
+        Offload BLIP-2 and CLIP to CPU around MusicGen when free VRAM is low
+        Gives generation the memory headroom on small GPUs, then restores them
+        """
+        import torch
+        
+        threshold = config.models.offload_vram_threshold_gb * (1 << 30)
+        offload = torch.cuda.is_available() and torch.cuda.mem_get_info()[0] < threshold
+        if offload:
+            self.logger.info("Low free VRAM - offloading image models during music generation")
+            self.image_analyzer.offload_models()
+        try:
+            yield
+        finally:
+            if offload:
+                self.image_analyzer.restore_models()
     
     def unload_models(self):
         """Unload all models to free memory"""
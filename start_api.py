@@ -3,17 +3,34 @@
 Start the FastAPI server
 """
 
+import importlib.util
+import os
+
 import uvicorn
 
+def _available(module: str) -> bool:
+    """Check for an optional accelerator without importing it"""
+    return importlib.util.find_spec(module) is not None
+
 if __name__ == "__main__":
+    # DEV=1 enables auto-reload, which uvicorn only supports with a single worker
+    dev_mode = os.getenv("DEV") == "1"
+    # Each worker loads its own copy of the models and its own batch queues,
+    # so the default stays at one - raise WORKERS only when memory allows
+    workers = 1 if dev_mode else int(os.getenv("WORKERS", "1"))
+    
     print("🚀 Starting Semantic Sonifier API Server...")
     print("📚 API Documentation: http://localhost:8000/docs")
+    print(f"⚙️  Workers: {workers}{' (dev mode, auto-reload)' if dev_mode else ''}")
     print("🛑 Press Ctrl+C to stop the server")
     
     uvicorn.run(
         "src.api.app:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,  # Auto-reload on code changes
+        workers=workers,
+        loop="uvloop" if _available("uvloop") else "auto",
+        http="httptools" if _available("httptools") else "auto",
+        reload=dev_mode,  # Auto-reload on code changes
         log_level="info"
     )
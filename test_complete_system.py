@@ -36,11 +36,11 @@ def test_complete_system():
                 try:
                     result = sonifier.process_image(str(image_path), duration=5)
                     
-                    print(f"✓ Caption: {result['caption']}")
-                    print(f"✓ Mood: {result['primary_mood']}")
-                    print(f"✓ Prompt: {result['prompt_used']}")
-                    print(f"✓ Audio: {len(result['audio_array'])} samples at {result['sample_rate']}Hz")
-                    print(f"✓ Duration: {result['duration_seconds']:.1f}s")
+                    print(f"✓ Caption: {result.caption}")
+                    print(f"✓ Mood: {result.primary_mood}")
+                    print(f"✓ Prompt: {result.prompt_used}")
+                    print(f"✓ Audio: {len(result.audio_array)} samples at {result.sample_rate}Hz")
+                    print(f"✓ Duration: {result.duration_seconds:.1f}s")
                     
                     # Save the audio
                     output_dir = Path("outputs/audio")
@@ -48,16 +48,47 @@ def test_complete_system():
                     
                     output_file = output_dir / f"{image_path.stem}_generated.wav"
                     
-                    # Save as WAV file
-                    from scipy.io import wavfile
-                    audio_normalized = result['audio_array'] / np.max(np.abs(result['audio_array']))
-                    wavfile.write(output_file, result['sample_rate'], audio_normalized)
+                    # Save as 16-bit PCM WAV file
+                    from src.utils.audio import save_wav
+                    save_wav(output_file, result.audio_array, result.sample_rate)
                     
                     print(f"✓ Audio saved: {output_file}")
                     
                 except Exception as e:
                     print(f"✗ Failed to process {image_path.name}: {e}")
         
+            # Streaming generation - chunks are written as they are decoded
+            image_path = test_images[0]
+            print(f"\\n--- Streaming Image: {image_path.name} ---")
+            
+            try:
+                analysis_result, music_stream = sonifier.stream_image(str(image_path), duration=5)
+                
+                print(f"✓ Caption: {analysis_result['caption']}")
+                print(f"✓ Prompt: {music_stream['prompt_used']}")
+                
+                output_dir = Path("outputs/audio")
+                output_dir.mkdir(parents=True, exist_ok=True)
+                
+                output_file = output_dir / f"{image_path.stem}_streamed.wav"
+                sample_rate = music_stream['sample_rate']
+                
+                # Write 16-bit PCM chunks as they are generated
+                import soundfile as sf
+                num_samples = 0
+                with sf.SoundFile(output_file, mode='w', samplerate=sample_rate,
+                                  channels=1, subtype='PCM_16') as audio_file:
+                    for chunk in music_stream['audio_chunks']:
+                        audio_file.write(chunk)
+                        num_samples += len(chunk)
+                
+                print(f"✓ Streamed audio: {num_samples} samples at {sample_rate}Hz")
+                print(f"✓ Duration: {num_samples / sample_rate:.1f}s")
+                print(f"✓ Audio saved: {output_file}")
+                
+            except Exception as e:
+                print(f"✗ Failed to stream {image_path.name}: {e}")
+        
         print("\\n🎉 Complete system test finished!")
         
     except Exception as e:
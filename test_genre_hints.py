@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test the genre-hint lookup against the original keyword rules
+"""
+
+from itertools import product
+
+def reference_genre_hint(caption: str, mood: str) -> str:
+    """The original if/elif keyword rules the lookup table replaces"""
+    caption_lower = caption.lower()
+    mood_lower = mood.lower()
+    
+    # Nature scenes
+    if any(word in caption_lower for word in ['forest', 'mountain', 'ocean', 'river', 'nature']):
+        if mood_lower in ['peaceful', 'serene', 'calm']:
+            return "ambient pads and gentle flutes"
+        elif mood_lower in ['dramatic', 'intense']:
+            return "epic orchestral strings and horns"
+    
+    # Urban scenes
+    if any(word in caption_lower for word in ['city', 'building', 'street', 'urban']):
+        if mood_lower in ['energetic', 'chaotic']:
+            return "electronic beats and synth bass"
+        elif mood_lower in ['melancholic', 'somber']:
+            return "slow piano and distant city sounds"
+    
+    # People/portraits
+    if any(word in caption_lower for word in ['person', 'people', 'portrait', 'face']):
+        if mood_lower in ['happy', 'joyful']:
+            return "upbeat acoustic guitar and light percussion"
+        elif mood_lower in ['mysterious', 'dreamy']:
+            return "ethereal vocals and reverbed textures"
+    
+    return ""
+
+def test_genre_hints():
+    print("Testing genre-hint lookup...")
+    
+    from src.models.sonifier import MusicOrchestrator, SCENE_KEYWORDS, GENRE_HINTS
+    
+    orchestrator = MusicOrchestrator()
+    
+    keywords = list(SCENE_KEYWORDS) + ['cat']
+    moods = sorted({mood for _, mood in GENRE_HINTS}) + ['neutral']
+    
+    captions = [
+        f"a {first.upper()} and {second} near {third}s"
+        for first, second, third in product(keywords, repeat=3)
+    ]
+    # Overlapping keywords - each must still count as a match
+    captions += ["a forestreet at dusk", "a personature walk", "Cityurban skyline", "a riverocean"]
+    
+    checked = 0
+    for caption, mood in product(captions, moods):
+        for mood_variant in (mood, mood.upper()):
+            expected = reference_genre_hint(caption, mood_variant)
+            actual = orchestrator._get_genre_hint(caption, mood_variant)
+            assert actual == expected, f"{caption!r}/{mood_variant!r}: {actual!r} != {expected!r}"
+            checked += 1
+    
+    print(f"✓ {checked} caption/mood combinations match the original rules")
+
+if __name__ == "__main__":
+    test_genre_hints()
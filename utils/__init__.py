@@ -3,11 +3,19 @@ Utility functions for Semantic Sonifier
 """
 
 from .config import config, save_config, load_config
-from .logging import logger, setup_logging, TimingLogger
+from .logging import get_logger, setup_logging, TimingLogger
 from .device_manager import DeviceManager
+from .audio import peak_amplitude, normalize_inplace, to_pcm16, save_wav
 
 __all__ = [
     "config", "save_config", "load_config",
-    "logger", "setup_logging", "TimingLogger",
-    "DeviceManager"
+    "logger", "get_logger", "setup_logging", "TimingLogger",
+    "DeviceManager",
+    "peak_amplitude", "normalize_inplace", "to_pcm16", "save_wav"
 ]
+
+def __getattr__(name: str):
+    # The shared logger (and its log file) is only created when first requested
+    if name == "logger":
+        return get_logger()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
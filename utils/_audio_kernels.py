@@ -0,0 +1,18 @@
+"""
+Numba kernels for audio utilities
+WHY: Kept out of utils.audio so numba is only imported when a kernel is used
+"""
+
+from numba import njit, prange
+
+@njit(cache=True, fastmath=True, parallel=True)
+def normalize_kernel(x):
+    """Fused abs-max reduction and in-place scale, vectorized by LLVM"""
+    peak = 0.0
+    for i in prange(x.size):
+        peak = max(peak, abs(x[i]))
+    if peak > 0:
+        inv = 1.0 / peak
+        for i in prange(x.size):
+            x[i] *= inv
+    return x
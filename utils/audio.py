@@ -0,0 +1,54 @@
+"""
+Audio Utilities for Semantic Sonifier
+WHY: One consistent, low-copy path for normalizing and saving generated audio
+"""
+
+from functools import lru_cache
+import numpy as np
+
+@lru_cache(maxsize=None)
+def _normalize_kernel():
+    """Numba normalize kernel, imported on first use; None without numba"""
+    try:
+        from ._audio_kernels import normalize_kernel
+    except ImportError:  # Optional - falls back to NumPy reductions
+        return None
+    return normalize_kernel
+
+def peak_amplitude(audio_array: np.ndarray) -> float:
+    """Absolute peak via min/max reductions - avoids materializing np.abs(audio)"""
+    if not audio_array.size:
+        return 0.0
+    return float(max(-audio_array.min(), audio_array.max()))
+
+def normalize_inplace(audio_array: np.ndarray) -> np.ndarray:
+    """Scale float audio to a peak of 1.0 in place and return it"""
+    if audio_array.ndim == 1 and audio_array.flags.c_contiguous:
+        kernel = _normalize_kernel()
+        if kernel is not None:
+            return kernel(audio_array)
+    
+    peak = peak_amplitude(audio_array)
+    if peak > 0:
+        np.multiply(audio_array, audio_array.dtype.type(1.0 / peak), out=audio_array)
+    return audio_array
+
+def to_pcm16(audio_array: np.ndarray) -> np.ndarray:
+    """
+    Peak-normalize float audio straight into int16 PCM
+    
+    Scales into a preallocated int16 buffer, so no float64 temporary is created.
+    """
+    scale = 32767.0 / (peak_amplitude(audio_array) or 1.0)
+    
+    pcm = np.empty(audio_array.shape, dtype=np.int16)
+    np.multiply(audio_array, scale, out=pcm, casting='unsafe')
+    return pcm
+
+def save_wav(path, audio_array: np.ndarray, sample_rate: int, buffer_size: int = 1 << 20):
+    """Write peak-normalized 16-bit PCM audio with a single buffered write"""
+    from scipy.io import wavfile
+    
+    pcm = to_pcm16(audio_array)
+    with open(path, 'wb', buffering=buffer_size) as f:
+        wavfile.write(f, sample_rate, pcm)
@@ -2,12 +2,22 @@
 Configuration Management for Semantic Sonifier
 """
 
+import json
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Dict, List, Optional
 import yaml
 
-@dataclass
+try:
+    import orjson
+except ImportError:  # Optional - stdlib json is used for .json configs
+    orjson = None
+
+# C-accelerated YAML parser when libyaml is available
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+@dataclass(frozen=True)
 class ModelConfig:
     """Configuration for AI models"""
     blip2_model: str = "Salesforce/blip2-opt-2.7b"
@@ -15,6 +25,14 @@ class ModelConfig:
     musicgen_model: str = "facebook/musicgen-small"
     device: str = "auto"
     torch_dtype: str = "float16"
+    blip2_batch_size: int = 8
+    clip_batch_size: int = 32
+    blip2_load_in_8bit: bool = False
+    # torch.compile on CUDA; backend is "inductor" or "tensorrt"
+    compile_models: bool = True
+    compile_backend: str = "inductor"
+    # Offload image models before MusicGen when free VRAM drops below this
+    offload_vram_threshold_gb: float = 4.0
     
     # Mood analysis
     mood_tags: tuple = (
@@ -22,52 +40,71 @@ class ModelConfig:
         "chaotic", "mysterious", "romantic", "dramatic", "calm",
         "joyful", "somber", "intense", "light", "dark", "dreamy"
     )
+    mood_prompt_template: str = "a {mood} image"
 
-@dataclass
+@dataclass(frozen=True)
 class AudioConfig:
     """Configuration for audio generation"""
     sample_rate: int = 32000
     default_duration: int = 10
     max_duration: int = 30
     output_format: str = "wav"
+    batch_size: int = 4
 
-@dataclass
+@dataclass(frozen=True)
 class EvaluationConfig:
     """Configuration for evaluation metrics"""
     clap_model: str = "laion/clap-htsat-unfused"
-    emotion_models: Dict = None
-    
-    def __post_init__(self):
-        if self.emotion_models is None:
-            self.emotion_models = {
-                "image": "miccunifi/emotic",
-                "audio": "music-emotion"
-            }
+    emotion_models: Dict = field(default_factory=lambda: {
+        "image": "miccunifi/emotic",
+        "audio": "music-emotion"
+    })
 
-@dataclass
+@dataclass(frozen=True)
+class LoggingConfig:
+    """Configuration for the logging pipeline"""
+    level: str = "INFO"
+    # Records buffered in memory before a batched write to the log file
+    file_buffer_capacity: int = 1024
+
+@dataclass(frozen=True)
 class ProjectConfig:
     """Main configuration class"""
     project_name: str = "semantic-sonifier"
     version: str = "0.1.0"
-    models: ModelConfig = None
-    audio: AudioConfig = None
-    evaluation: EvaluationConfig = None
+    models: ModelConfig = field(default_factory=ModelConfig)
+    audio: AudioConfig = field(default_factory=AudioConfig)
+    evaluation: EvaluationConfig = field(default_factory=EvaluationConfig)
+    logging: LoggingConfig = field(default_factory=LoggingConfig)
     
-    def __post_init__(self):
-        if self.models is None:
-            self.models = ModelConfig()
-        if self.audio is None:
-            self.audio = AudioConfig()
-        if self.evaluation is None:
-            self.evaluation = EvaluationConfig()
+    @classmethod
+    def from_dict(cls, config_dict: Dict) -> 'ProjectConfig':
+        """Build configuration from a plain dict, e.g. a parsed config file"""
+        config_dict = dict(config_dict or {})
+        models = dict(config_dict.pop('models', None) or {})
+        if 'mood_tags' in models:
+            models['mood_tags'] = tuple(models['mood_tags'])
+        
+        return cls(
+            models=ModelConfig(**models),
+            audio=AudioConfig(**(config_dict.pop('audio', None) or {})),
+            evaluation=EvaluationConfig(**(config_dict.pop('evaluation', None) or {})),
+            logging=LoggingConfig(**(config_dict.pop('logging', None) or {})),
+            **config_dict
+        )
     
     @classmethod
     def from_yaml(cls, config_path: str) -> 'ProjectConfig':
-        """Load configuration from YAML file"""
+        """Load configuration from YAML (or JSON) file"""
         if os.path.exists(config_path):
-            with open(config_path, 'r') as f:
-                config_dict = yaml.safe_load(f)
-            return cls(**config_dict)
+            if config_path.endswith('.json'):
+                with open(config_path, 'rb') as f:
+                    data = f.read()
+                config_dict = orjson.loads(data) if orjson else json.loads(data)
+            else:
+                with open(config_path, 'r') as f:
+                    config_dict = yaml.load(f, Loader=_YAML_LOADER)
+            return cls.from_dict(config_dict)
         else:
             return cls()
 
@@ -75,7 +112,7 @@ class ProjectConfig:
 config = ProjectConfig()
 
 def save_config(config_path: str = "config.yaml"):
-    """Save current configuration to YAML file"""
+    """Save current configuration to YAML (or JSON, by extension) file"""
     config_dict = {
         'project_name': config.project_name,
         'version': config.version,
@@ -85,23 +122,55 @@ def save_config(config_path: str = "config.yaml"):
             'musicgen_model': config.models.musicgen_model,
             'device': config.models.device,
             'torch_dtype': config.models.torch_dtype,
-            'mood_tags': list(config.models.mood_tags)
+            'blip2_batch_size': config.models.blip2_batch_size,
+            'clip_batch_size': config.models.clip_batch_size,
+            'blip2_load_in_8bit': config.models.blip2_load_in_8bit,
+            'compile_models': config.models.compile_models,
+            'compile_backend': config.models.compile_backend,
+            'offload_vram_threshold_gb': config.models.offload_vram_threshold_gb,
+            'mood_tags': list(config.models.mood_tags),
+            'mood_prompt_template': config.models.mood_prompt_template
         },
         'audio': {
             'sample_rate': config.audio.sample_rate,
             'default_duration': config.audio.default_duration,
             'max_duration': config.audio.max_duration,
-            'output_format': config.audio.output_format
+            'output_format': config.audio.output_format,
+            'batch_size': config.audio.batch_size
+        },
+        'logging': {
+            'level': config.logging.level,
+            'file_buffer_capacity': config.logging.file_buffer_capacity
         }
     }
     
-    with open(config_path, 'w') as f:
-        yaml.dump(config_dict, f, default_flow_style=False)
+    if config_path.endswith('.json'):
+        with open(config_path, 'wb') as f:
+            if orjson:
+                f.write(orjson.dumps(config_dict, option=orjson.OPT_INDENT_2))
+            else:
+                f.write(json.dumps(config_dict, indent=2).encode())
+    else:
+        with open(config_path, 'w') as f:
+            yaml.dump(config_dict, f, default_flow_style=False)
+    
+    # A previously parsed copy of this file is now stale
+    _read_config.cache_clear()
     
     print(f"Configuration saved to {config_path}")
 
+@lru_cache(maxsize=None)
+def _read_config(config_path: str) -> ProjectConfig:
+    # Configs are frozen, so one parsed instance per path can be shared
+    return ProjectConfig.from_yaml(config_path)
+
 def load_config(config_path: str = "config.yaml"):
-    """Load configuration from YAML file"""
+    """Load configuration from YAML or JSON file"""
     global config
-    config = ProjectConfig.from_yaml(config_path)
+    config = _read_config(config_path)
+    
+    # A logger created before the config was loaded picks up its level now
+    from .logging import reconfigure_logging
+    reconfigure_logging()
+    
     return config
@@ -3,97 +3,230 @@ Professional Logging System for Semantic Sonifier
 WHY: Debugging, monitoring, and maintaining production systems
 """
 
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
+import time
 from pathlib import Path
-from .config import config
+from typing import Optional
+
+# Skip the thread/process lookups every LogRecord performs - the formats never show them
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
+# INFO+ records drop filename:lineno; the verbose format is only used at DEBUG
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DEBUG_LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+class CallerFormatter(logging.Formatter):
+    """
+    Adds filename:lineno only to records that carry caller info
+    Caller info is captured only at DEBUG, so buffered records keep the
+    format of the level they were logged under.
+    """
+    
+    def __init__(self):
+        super().__init__(LOG_FORMAT, datefmt=DATE_FORMAT)
+        self._verbose = logging.Formatter(DEBUG_LOG_FORMAT, datefmt=DATE_FORMAT)
+    
+    def format(self, record: logging.LogRecord) -> str:
+        if record.lineno:
+            return self._verbose.format(record)
+        return super().format(record)
+
+# Caller lookup switch as shipped by the stdlib, restored when DEBUG is re-enabled
+_DEFAULT_SRCFILE = logging._srcfile
+
+class FastRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    RotatingFileHandler that keeps a running byte count of the log file
+    The stock shouldRollover seeks and tells the stream on every record;
+    here the tracked size decides, so emitting costs no extra syscall.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        try:
+            self._pos = os.path.getsize(self.baseFilename)
+        except OSError:
+            self._pos = 0
+        self._pending = 0
+    
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        # Size of the record about to be written, kept for emit()
+        self._pending = len(self.format(record).encode(self.encoding or 'utf-8')) + len(self.terminator)
+        return self.maxBytes > 0 and self._pos + self._pending >= self.maxBytes
+    
+    def emit(self, record: logging.LogRecord):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            logging.FileHandler.emit(self, record)
+            self._pos += self._pending
+        except Exception:
+            self.handleError(record)
+    
+    def doRollover(self):
+        super().doRollover()
+        self._pos = 0
 
 def setup_logging(
     name: str = "semantic_sonifier",
-    log_level: str = "INFO",
+    log_level: Optional[str] = None,
     log_dir: str = "logs",
     max_bytes: int = 10 * 1024 * 1024,  # 10MB
-    backup_count: int = 5
+    backup_count: int = 5,
+    file_buffer_capacity: Optional[int] = None
 ) -> logging.Logger:
     """
     Set up professional logging with file rotation and console output
     
+    Records are enqueued by a QueueHandler and formatted/written by a
+    QueueListener thread, so callers never block on console or disk I/O.
+    
     Args:
         name: Logger name
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR)
+            (defaults to config.logging.level)
         log_dir: Directory to store log files
         max_bytes: Maximum log file size before rotation
         backup_count: Number of backup files to keep
+        file_buffer_capacity: Records buffered before a batched file write
+            (defaults to config.logging.file_buffer_capacity)
     """
+    # Read config at call time so a loaded config file is honoured
+    from .config import config
+    log_level = log_level or config.logging.level
     
     # Create logs directory
     Path(log_dir).mkdir(exist_ok=True)
     
     # Create logger
     logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, log_level.upper()))
     
-    # Avoid duplicate handlers
+    # Already set up - reuse the handlers but honour the requested level
     if logger.handlers:
+        _apply_level(logger, log_level)
         return logger
     
-    # Log format
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
     # Console Handler
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(getattr(logging, log_level.upper()))
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    console_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT))
     
     # File Handler with rotation
     log_file = Path(log_dir) / f"{name}.log"
-    file_handler = logging.handlers.RotatingFileHandler(
+    file_handler = FastRotatingFileHandler(
         log_file,
         maxBytes=max_bytes,
         backupCount=backup_count,
         encoding='utf-8'
     )
     file_handler.setLevel(logging.DEBUG)  # File gets all levels
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    file_handler.setFormatter(CallerFormatter())
+    
+    logger._console_handler = console_handler
+    _apply_level(logger, log_level)
+    
+    # Batch file writes - errors flush immediately so crash diagnostics reach disk
+    buffered_file_handler = logging.handlers.MemoryHandler(
+        capacity=file_buffer_capacity or config.logging.file_buffer_capacity,
+        flushLevel=logging.ERROR,
+        target=file_handler,
+        flushOnClose=True
+    )
+    
+    # Emitting is a queue put - formatting and I/O happen on the listener thread
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(
+        log_queue, console_handler, buffered_file_handler, respect_handler_level=True
+    )
+    listener.start()
+    logger._listener = listener
+    # On interpreter shutdown drain the queue, then flush the file buffer
+    # (atexit runs handlers last-registered first)
+    atexit.register(buffered_file_handler.flush)
+    atexit.register(listener.stop)
     
     logger.info(f"Logging initialized for {name} at level {log_level}")
     logger.info(f"Log files stored in: {log_dir}")
     
     return logger
 
-# Global logger instance
-logger = setup_logging()
+def _apply_level(logger: logging.Logger, log_level: str):
+    """Set the logger/console level and whether caller info is captured"""
+    level = getattr(logging, log_level.upper())
+    
+    logger.setLevel(level)
+    logger._console_handler.setLevel(level)
+    _update_caller_info()
+
+def _update_caller_info():
+    """
+    Capture caller info only while some logger in the process can emit DEBUG
+    logging._srcfile is the documented, process-wide switch that skips the
+    per-record stack walk, so it follows the lowest level among all loggers.
+    """
+    loggers = [logging.getLogger()] + [
+        candidate for candidate in logging.Logger.manager.loggerDict.values()
+        if isinstance(candidate, logging.Logger)
+    ]
+    debug = any(candidate.getEffectiveLevel() <= logging.DEBUG for candidate in loggers)
+    logging._srcfile = _DEFAULT_SRCFILE if debug else None
+
+_logger = None
+
+def get_logger() -> logging.Logger:
+    """Global logger, set up from config.logging on first use"""
+    global _logger
+    if _logger is None:
+        _logger = setup_logging()
+    return _logger
+
+def reconfigure_logging():
+    """Reapply config.logging.level to the global logger if it already exists"""
+    if _logger is not None:
+        from .config import config
+        _apply_level(_logger, config.logging.level)
+
+def __getattr__(name: str):
+    # `from src.utils.logging import logger` keeps working, but only sets up
+    # logging when the logger is actually requested
+    if name == "logger":
+        return get_logger()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 class TimingLogger:
     """Utility class for timing operations with logging"""
     
     def __init__(self, operation_name: str, logger: logging.Logger = None):
         self.operation_name = operation_name
-        self.logger = logger or logging.getLogger("semantic_sonifier")
+        self.logger = logger or get_logger()
         self.start_time = None
+        # Checked once so disabled INFO costs a single attribute load per enter/exit
+        self._info_enabled = self.logger.isEnabledFor(logging.INFO)
     
     def __enter__(self):
-        self.start_time = time.time()
-        self.logger.info(f"Starting: {self.operation_name}")
+        # Monotonic integer clock - converted to seconds only when formatting
+        self.start_time = time.perf_counter_ns()
+        if self._info_enabled:
+            self.logger.info("Starting: %s", self.operation_name)
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        elapsed = time.time() - self.start_time
+        elapsed_ns = time.perf_counter_ns() - self.start_time
         if exc_type is None:
-            self.logger.info(f"Completed: {self.operation_name} in {elapsed:.2f}s")
+            if self._info_enabled:
+                self.logger.info("Completed: %s in %.2fs", self.operation_name, elapsed_ns / 1e9)
         else:
-            self.logger.error(f"Failed: {self.operation_name} after {elapsed:.2f}s - {exc_val}")
+            self.logger.error("Failed: %s after %.2fs - %s", self.operation_name, elapsed_ns / 1e9, exc_val)
     
     def checkpoint(self, checkpoint_name: str):
         """Log a checkpoint with timing"""
-        elapsed = time.time() - self.start_time
-        self.logger.debug(f"Checkpoint '{checkpoint_name}': {elapsed:.2f}s")
-
-# Import time for TimingLogger
-import time
+        elapsed_ns = time.perf_counter_ns() - self.start_time
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Checkpoint '%s': %.2fs", checkpoint_name, elapsed_ns / 1e9)
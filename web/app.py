@@ -3,7 +3,10 @@ Streamlit Web Interface for Semantic Sonifier
 """
 
 import streamlit as st
+import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 import time
 from pathlib import Path
 
@@ -13,7 +16,8 @@ st.set_page_config(
     layout="wide"
 )
 
-st.markdown("""
+# Static HTML fragments are built once at import, not per rerun
+_CSS = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -21,27 +25,65 @@ st.markdown("""
         text-align: center;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+_HEADER_TITLE_HTML = '<h1 class="main-header">🎵 Semantic Sonifier</h1>'
+
+_HEADER_INTRO_HTML = """
+        <div style='text-align: center; margin-bottom: 2rem;'>
+            <h3>Transform images into music using AI</h3>
+            <p>Upload an image and our AI will analyze its content and mood to generate unique music</p>
+        </div>
+        """
+
+# Emitted on every rerun - Streamlit drops elements a rerun does not re-emit
+st.markdown(_CSS, unsafe_allow_html=True)
+
+# Session state keys and their initial values
+_SESSION_DEFAULTS = (
+    ("processing", False),
+    ("result", None),
+)
+
+# (connect, read) timeouts in seconds - a stalled backend must not hang the UI
+CONNECT_TIMEOUT = 3.0
+AUDIO_TIMEOUT = (CONNECT_TIMEOUT, 30.0)
+
+# API base URL as seen from the user's browser, e.g. https://sonifier.example.com/api.
+# When unset, audio is relayed through Streamlit - the API is only known to be
+# reachable from this server, not from the browser
+PUBLIC_API_URL = os.getenv("PUBLIC_API_URL", "").rstrip("/")
+
+@st.cache_resource
+def _get_session() -> requests.Session:
+    """One pooled HTTP session shared across reruns, so backend connections are kept alive"""
+    session = requests.Session()
+    # One retry on connection errors and gateway statuses; POSTs are only retried
+    # when the connection failed, so a generation is never submitted twice
+    retry = Retry(total=1, connect=1, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry))
+    return session
+
+@st.cache_data(max_entries=8, ttl=600)
+def _fetch_audio(api_base: str, file_id: str) -> bytes:
+    """Download a generated WAV once per file_id - reruns reuse the cached bytes"""
+    response = _get_session().get(f"{api_base}/audio/{file_id}", timeout=AUDIO_TIMEOUT)
+    response.raise_for_status()
+    return response.content
 
 class SonifierWebApp:
     def __init__(self):
         self.api_base = "http://localhost:8000"
+        self.session = _get_session()
         self.setup_session_state()
     
     def setup_session_state(self):
-        if 'processing' not in st.session_state:
-            st.session_state.processing = False
-        if 'result' not in st.session_state:
-            st.session_state.result = None
+        for key, default in _SESSION_DEFAULTS:
+            st.session_state.setdefault(key, default)
     
     def render_header(self):
-        st.markdown('<h1 class="main-header">🎵 Semantic Sonifier</h1>', unsafe_allow_html=True)
-        st.markdown("""
-        <div style='text-align: center; margin-bottom: 2rem;'>
-            <h3>Transform images into music using AI</h3>
-            <p>Upload an image and our AI will analyze its content and mood to generate unique music</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(_HEADER_TITLE_HTML, unsafe_allow_html=True)
+        st.markdown(_HEADER_INTRO_HTML, unsafe_allow_html=True)
     
     def render_upload_section(self):
         st.subheader("📷 Upload Image")
@@ -73,13 +115,17 @@ class SonifierWebApp:
             st.session_state.result = None
             
             with st.spinner("🔄 Analyzing image and generating music..."):
-                files = {"image": (uploaded_file.name, uploaded_file.getvalue(), uploaded_file.type)}
+                # Hand requests the file object itself - it reads from it while encoding
+                uploaded_file.seek(0)
+                files = {"image": (uploaded_file.name, uploaded_file, uploaded_file.type)}
                 data = {"duration": duration}
                 
-                response = requests.post(
+                response = self.session.post(
                     f"{self.api_base}/process",
                     files=files,
-                    data=data
+                    data=data,
+                    # Generation time grows with the requested duration
+                    timeout=(CONNECT_TIMEOUT, max(30.0, duration * 3))
                 )
                 
                 if response.status_code == 200:
@@ -91,6 +137,8 @@ class SonifierWebApp:
         except requests.exceptions.ConnectionError:
             st.error("🚨 Cannot connect to the AI server. Make sure the FastAPI server is running.")
             st.info("Run: `python start_api.py` in another terminal")
+        except requests.exceptions.Timeout:
+            st.error("⏱️ The AI server took too long to respond. Please try again.")
         except Exception as e:
             st.error(f"❌ Processing failed: {str(e)}")
         finally:
@@ -118,21 +166,31 @@ class SonifierWebApp:
         
         st.subheader("🎵 Generated Music")
         
+        if PUBLIC_API_URL:
+            # Let the browser stream straight from the API
+            audio_url = f"{PUBLIC_API_URL}/audio/{result['file_id']}"
+            st.audio(audio_url, format="audio/wav")
+            st.markdown(
+                f'<a href="{audio_url}" download="sonified_{result["file_id"]}.wav">📥 Download Audio</a>',
+                unsafe_allow_html=True
+            )
+            return
+        
+        # Relay the bytes through Streamlit
         try:
-            audio_response = requests.get(f"{self.api_base}/audio/{result['file_id']}")
+            audio_bytes = _fetch_audio(self.api_base, result['file_id'])
             
-            if audio_response.status_code == 200:
-                st.audio(audio_response.content, format="audio/wav")
-                
-                st.download_button(
-                    label="📥 Download Audio",
-                    data=audio_response.content,
-                    file_name=f"sonified_{result['file_id']}.wav",
-                    mime="audio/wav"
-                )
-            else:
-                st.error("Could not load audio file")
+            st.audio(audio_bytes, format="audio/wav")
+            
+            st.download_button(
+                label="📥 Download Audio",
+                data=audio_bytes,
+                file_name=f"sonified_{result['file_id']}.wav",
+                mime="audio/wav"
+            )
                 
+        except requests.exceptions.HTTPError:
+            st.error("Could not load audio file")
         except Exception as e:
             st.error(f"Error loading audio: {str(e)}")
     